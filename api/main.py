@@ -4,39 +4,59 @@ Cloud API for AutoResponder
 Exposes a /webhook endpoint that accepts JSON and returns a reply.
 """
 
-import json
-import traceback
+import asyncio
+import atexit
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Any
 
+import orjson
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 
 from src.chatbot import Chatbot
+from src.engine.context_builder import ContextBuilder, partner_key
+from src.logging_utils import get_logger
 from src.config import (
     AUTORESPONDER_SHARED_SECRET,
+    DATA_DIR,
     HISTORY_BACKEND,
     PEOPLE_FILE,
 )
 
+logger = get_logger(__name__)
 
-def _load_people() -> dict:
-    try:
-        with open(PEOPLE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+FEEDBACK_FILE = DATA_DIR / "feedback.jsonl"
+
+# /rate appends into one process-wide buffered handle; a background task
+# flushes it to disk every second (and it is closed on shutdown/exit).
+_FEEDBACK_FLUSH_INTERVAL = 1.0
+_FEEDBACK_BUFFER_SIZE = 64 * 1024
+_feedback_fh = None
 
 
 def _resolve_partner_name(sender_name: str) -> str:
-    people = _load_people()
-    partners = people.get("partners", {})
     if not sender_name:
         return "a girl"
-    needle = sender_name.strip().lower()
-    for name, info in partners.items():
-        aliases = [name] + info.get("aliases", [])
-        if any(needle == a.lower() for a in aliases if isinstance(a, str)):
-            return name
-    return sender_name
+    # Same cached index (and alias normalisation) the prompt builder uses
+    _, partners = ContextBuilder.load_people(PEOPLE_FILE)
+    match = partners.get(partner_key(sender_name))
+    return match[0] if match else sender_name
+
+
+# Accepted field names per value, in priority order
+_MSG_KEYS = ("message", "message_text", "text", "body")
+_SENDER_NAME_KEYS = ("sender", "sender_name", "from_name", "chat_name", "name")
+_SENDER_ID_KEYS = ("sender_id", "from", "chat_id", "conversation_id", "phone")
+
+
+def _first(data: dict[str, Any], keys: tuple[str, ...]) -> str:
+    """First truthy value among `keys`, stripped ("" if none)."""
+    for key in keys:
+        value = data.get(key)
+        if value:
+            return value.strip() if isinstance(value, str) else str(value).strip()
+    return ""
 
 
 def _parse_payload(payload: dict[str, Any]) -> dict[str, str]:
@@ -46,41 +66,26 @@ def _parse_payload(payload: dict[str, Any]) -> dict[str, str]:
     elif "data" in payload and isinstance(payload["data"], dict):
         data = payload["data"]
 
-    message = (
-        data.get("message")
-        or data.get("message_text")
-        or data.get("text")
-        or data.get("body")
-        or ""
-    )
-    sender_name = (
-        data.get("sender")
-        or data.get("sender_name")
-        or data.get("from_name")
-        or data.get("chat_name")
-        or data.get("name")
-        or ""
-    )
-    group_participant = data.get("groupParticipant") or ""
-    is_group = bool(data.get("isGroup"))
-    sender_id = (
-        data.get("sender_id")
-        or data.get("from")
-        or data.get("chat_id")
-        or data.get("conversation_id")
-        or data.get("phone")
-        or ""
-    )
-
     return {
-        "message": str(message).strip(),
-        "sender_id": str(sender_id).strip(),
-        "sender_name": str(sender_name).strip(),
-        "group_participant": str(group_participant).strip(),
-        "is_group": "1" if is_group else "0",
+        "message": _first(data, _MSG_KEYS),
+        "sender_id": _first(data, _SENDER_ID_KEYS),
+        "sender_name": _first(data, _SENDER_NAME_KEYS),
+        "group_participant": _first(data, ("groupParticipant",)),
+        "is_group": "1" if data.get("isGroup") else "0",
     }
 
 
+async def _read_json(request: Request) -> dict[str, Any]:
+    """Decode the raw body with orjson (no Starlette/stdlib json round trip)."""
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="JSON body must be an object")
+    return payload
+
+
 def _build_bot() -> Chatbot:
     if HISTORY_BACKEND == "firestore":
         from src.memory.firestore_history import FirestoreHistory
@@ -97,7 +102,50 @@ def _build_bot() -> Chatbot:
 BOT = _build_bot()
 
 
-app = FastAPI(title="Shreyash WhatsApp Twin")
+# ── Feedback Writer ──────────────────────────────────────────────────────
+
+def _feedback_handle():
+    """Open the feedback JSONL once, in buffered binary-append mode."""
+    global _feedback_fh
+    if _feedback_fh is None or _feedback_fh.closed:
+        FEEDBACK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _feedback_fh = open(FEEDBACK_FILE, "ab", buffering=_FEEDBACK_BUFFER_SIZE)
+        atexit.register(_feedback_fh.close)
+    return _feedback_fh
+
+
+async def _flush_feedback_loop():
+    """Push buffered feedback to disk periodically."""
+    while True:
+        await asyncio.sleep(_FEEDBACK_FLUSH_INTERVAL)
+        if _feedback_fh is not None and not _feedback_fh.closed:
+            try:
+                _feedback_fh.flush()
+            except Exception:
+                logger.exception("Feedback flush failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    flusher = asyncio.create_task(_flush_feedback_loop())
+    try:
+        yield
+    finally:
+        flusher.cancel()
+        await BOT.llm.aclose()
+        await asyncio.to_thread(BOT.close)   # drains buffered history writes
+        if HISTORY_BACKEND == "mongo":
+            from src.memory.mongo_history import close_shared_clients
+            close_shared_clients()
+        if _feedback_fh is not None:
+            _feedback_fh.close()   # close() flushes whatever is buffered
+
+
+app = FastAPI(
+    title="Shreyash WhatsApp Twin",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 
 @app.get("/")
@@ -113,7 +161,7 @@ async def webhook(request: Request):
         if token != AUTORESPONDER_SHARED_SECRET:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-    payload = await request.json()
+    payload = await _read_json(request)
     parsed = _parse_payload(payload)
 
     if not parsed["message"]:
@@ -136,8 +184,8 @@ async def webhook(request: Request):
             conversation_id=conversation_id,
             partner_name=partner_name,
         )
-    except Exception as e:
-        traceback.print_exc()
+    except Exception:
+        logger.exception("respond() failed", extra={"conv": conversation_id})
         return {"replies": [{"message": "Hmm"}]}
 
     return {"replies": [{"message": msg} for msg in responses]}
@@ -154,10 +202,7 @@ async def rate_response(request: Request):
     Payload: {"conversation_id": "...", "rating": "good"|"bad",
              "message": "...", "response": "...", "note": "..."}
     """
-    from datetime import datetime
-    from pathlib import Path
-
-    payload = await request.json()
+    payload = await _read_json(request)
     rating = payload.get("rating", "")
     if rating not in ("good", "bad"):
         raise HTTPException(status_code=400, detail="rating must be 'good' or 'bad'")
@@ -171,10 +216,8 @@ async def rate_response(request: Request):
         "note": payload.get("note", ""),
     }
 
-    feedback_file = Path("data/feedback.jsonl")
-    feedback_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(feedback_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    # Buffered in memory; _flush_feedback_loop() writes it out within ~1s
+    _feedback_handle().write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
 
     return {"saved": True, "rating": rating}
 
@@ -0,0 +1,44 @@
+"""
+Async Helpers
+=============
+One long-lived event loop (on a daemon thread) for sync callers, so
+wrappers like respond_sync() / generate_sync() submit coroutines to it
+instead of spinning up a thread pool + asyncio.run() per call. Clients
+that pool connections per loop (httpx) keep them across calls, too.
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """The shared background loop, started on first use."""
+    global _LOOP
+    if _LOOP is None:
+        with _LOOP_LOCK:
+            if _LOOP is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    name="sync-loop",
+                    daemon=True,
+                ).start()
+                _LOOP = loop
+    return _LOOP
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run `coro` on the background loop and block until it finishes."""
+    loop = background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the background loop itself")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -11,27 +11,33 @@ Supports both interactive CLI mode and programmatic API.
 import asyncio
 import random
 import re
-import traceback
+import threading
 from datetime import datetime
 from pathlib import Path
 
-from src.config import RETRIEVAL_TOP_K, HISTORY_WINDOW
-from src.memory.vector_store import VectorStore
-from src.memory.history import ConversationHistory
-from src.integrations.sheets_logger import SheetsLogger
+from src.config import RETRIEVAL_TOP_K, HISTORY_WINDOW, SHEETS_LOG_ENABLED
+from src.memory.history import ConversationHistory, flatten_content
 from src.llm.fallback import LLMFallbackChain
 from src.engine.context_builder import ContextBuilder
 from src.engine.post_processor import PostProcessor
+from src.async_utils import run_sync
+from src.logging_utils import get_logger
 from typing import Optional
 
+logger = get_logger(__name__)
+
 
 class Chatbot:
     """Shreyash's digital twin chatbot."""
 
     def __init__(self, history=None, vector_store=None, sheets_logger=None):
-        self.vector_store = vector_store or VectorStore()
+        # Vector store + Sheets logger are built on first use (see properties)
+        # so constructing the bot — e.g. at API import — stays cheap.
+        self._vector_store = vector_store
+        self._sheets_logger = sheets_logger
+        self._lazy_lock = threading.Lock()
+
         self.history = history or ConversationHistory()
-        self.sheets_logger = sheets_logger or SheetsLogger()
         self.llm = LLMFallbackChain()
         self.context_builder = ContextBuilder()
         self.post_processor = PostProcessor()
@@ -39,6 +45,41 @@ class Chatbot:
         self._conversation_id: str = "default"
         self._partner_name: str = "a girl"
 
+        # Strong refs to fire-and-forget write tasks so they aren't GC'd mid-flight
+        self._background_tasks: set[asyncio.Task] = set()
+
+        # Sticky once true — the index doesn't empty itself while serving
+        self._vs_has_data: bool = False
+
+    # ── Lazy Components ───────────────────────────────────────────────────
+
+    @property
+    def vector_store(self):
+        """ChromaDB store; importing chromadb + loading the index is slow."""
+        if self._vector_store is None:
+            with self._lazy_lock:
+                if self._vector_store is None:
+                    from src.memory.vector_store import VectorStore
+                    self._vector_store = VectorStore()
+        return self._vector_store
+
+    @property
+    def sheets_logger(self):
+        """Google Sheets logger; googleapiclient is only imported when needed."""
+        if self._sheets_logger is None:
+            with self._lazy_lock:
+                if self._sheets_logger is None:
+                    from src.integrations.sheets_logger import SheetsLogger
+                    self._sheets_logger = SheetsLogger()
+        return self._sheets_logger
+
+    @property
+    def _sheets_enabled(self) -> bool:
+        """Sheets logging on? Answered without building the logger."""
+        if self._sheets_logger is not None:
+            return self._sheets_logger.enabled
+        return SHEETS_LOG_ENABLED
+
     # ── Message Filtering ─────────────────────────────────────────────────
 
     @staticmethod
@@ -87,8 +128,7 @@ class Chatbot:
         try:
             self.history.get_or_create_conversation(conversation_id, partner_name)
         except Exception as e:
-            print(f"[Chatbot] ❌ CRITICAL: Failed to init conversation in DB: {e}")
-            traceback.print_exc()
+            logger.exception("[Chatbot] ❌ CRITICAL: Failed to init conversation in DB: %s", e)
 
     def status(self) -> dict:
         """Get chatbot system status."""
@@ -107,9 +147,53 @@ class Chatbot:
             "history_stats": stats,
         }
 
+    # ── Background Writes ─────────────────────────────────────────────────
+
+    def _write_in_background(self, label: str, func, **kwargs) -> asyncio.Task:
+        """
+        Run a blocking history write in a worker thread without
+        awaiting it, so DB latency stays off the reply path.
+        Failures are logged, never raised; the task resolves to whether
+        the write succeeded.
+        """
+        async def runner() -> bool:
+            try:
+                await asyncio.to_thread(func, **kwargs)
+            except Exception as e:
+                logger.exception("[Chatbot] ❌ FAILED: %s: %s", label, e)
+                return False
+            return True
+
+        task = asyncio.create_task(runner())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
     # ── Core Response Generation ──────────────────────────────────────────
 
-    
+    def _retrieve_examples(self, girl_message: str) -> list[dict]:
+        """Blocking few-shot retrieval from the vector store."""
+        if not self._vs_has_data:
+            self._vs_has_data = self.vector_store.count() > 0
+        if self._vs_has_data:
+            return self.vector_store.retrieve(
+                query=girl_message,
+                top_k=RETRIEVAL_TOP_K,
+            )
+        return []
+
+    async def _history_after_write(
+        self, user_write: asyncio.Task, conversation_id: str
+    ) -> tuple[bool, list[dict]]:
+        """(user message saved?, recent turns), read once that write is done."""
+        # shield: cancelling the reply must not cancel the write itself
+        saved = await asyncio.shield(user_write)
+        turns = await asyncio.to_thread(
+            self.history.get_recent_as_chatml,
+            conversation_id=conversation_id,
+            limit=HISTORY_WINDOW,
+        )
+        return saved, turns
 
     async def respond(
         self,
@@ -123,67 +207,61 @@ class Chatbot:
         conv_id = conversation_id or self._conversation_id
         partner = partner_name or self._partner_name
 
-        print(f"[Chatbot] Processing message from {conv_id}: '{girl_message[:20]}...'")
+        logger.debug("[Chatbot] Processing message from %s: '%.20s...'", conv_id, girl_message)
 
         # 0. Ensure conversation exists
         try:
             self.history.get_or_create_conversation(conv_id, partner)
         except Exception as e:
-            print(f"[Chatbot] ❌ ERROR: Could not create/get conversation: {e}")
+            logger.exception("[Chatbot] ❌ ERROR: Could not create/get conversation: %s", e)
+
+        # 1. Store girl's message (CRITICAL WRITE 1) — fire-and-forget
+        logger.debug("[Chatbot] Saving USER message to history...")
+        user_write = self._write_in_background(
+            "save USER message to DB",
+            self.history.add_message,
+            conversation_id=conv_id,
+            role="user",
+            content=girl_message,
+        )
 
-        # 1. Store girl's message (CRITICAL WRITE 1)
-        print("[Chatbot] Saving USER message to history...")
-        try:
-            self.history.add_message(
+        # 1.5 Skip check — 50% chance to not reply to incomprehensible messages
+        if self._should_skip(girl_message):
+            logger.debug("[Chatbot] ⏭ Skipping incomprehensible message: '%.30s...'", girl_message)
+            return []
+
+        # 1.6 Optional Sheet Logging — only queues the row (batched upload)
+        if self._sheets_enabled:
+            self.sheets_logger.append_message(
                 conversation_id=conv_id,
+                partner_name=partner,
                 role="user",
                 content=girl_message,
             )
-            print("[Chatbot] ✅ USER message saved.")
-        except Exception as e:
-            print(f"[Chatbot] ❌ FAILED to save USER message to DB: {e}")
-            traceback.print_exc()
-
-        # 1.5 Skip check — 50% chance to not reply to incomprehensible messages
-        if self._should_skip(girl_message):
-            print(f"[Chatbot] ⏭ Skipping incomprehensible message: '{girl_message[:30]}...'")
-            return []
 
-        # 1.6 Optional Sheet Logging
-        if self.sheets_logger.enabled:
-            try:
-                self.sheets_logger.append_message(
-                    conversation_id=conv_id,
-                    partner_name=partner,
-                    role="user",
-                    content=girl_message,
-                )
-            except Exception as e:
-                print(f"[Chatbot] Sheet logging failed: {e}")
+        # 2 + 3. Retrieve similar examples and fetch conversation history
+        # concurrently — independent blocking calls (Chroma / history DB).
+        # The history read waits for the user write, so it deterministically
+        # includes the new message whenever that write landed.
+        retrieved, history_result = await asyncio.gather(
+            asyncio.to_thread(self._retrieve_examples, girl_message),
+            self._history_after_write(user_write, conv_id),
+            return_exceptions=True,
+        )
 
-        # 2. Retrieve similar examples
-        retrieved = []
-        try:
-            if self.vector_store.count() > 0:
-                retrieved = self.vector_store.retrieve(
-                    query=girl_message,
-                    top_k=RETRIEVAL_TOP_K,
-                )
-        except Exception as e:
-            print(f"[Chatbot] Vector retrieval failed (non-fatal): {e}")
+        if isinstance(retrieved, Exception):
+            logger.warning("[Chatbot] Vector retrieval failed (non-fatal): %s", retrieved)
+            retrieved = []
 
-        # 3. Get conversation history
-        history_turns = []
-        try:
-            history_turns = self.history.get_recent_as_chatml(
-                conversation_id=conv_id,
-                limit=HISTORY_WINDOW,
-            )
-            # Remove the last turn (it's the girl_message we just added)
-            if history_turns and history_turns[-1]["content"] == girl_message:
+        if isinstance(history_result, Exception):
+            logger.error("[Chatbot] ❌ Failed to fetch history context: %s", history_result)
+            history_turns = []
+        else:
+            user_saved, history_turns = history_result
+            # Remove the last turn (it's the girl_message we just added) — only
+            # if that write landed, else it would be an earlier identical turn
+            if user_saved and history_turns and history_turns[-1]["content"] == girl_message:
                 history_turns = history_turns[:-1]
-        except Exception as e:
-             print(f"[Chatbot] ❌ Failed to fetch history context: {e}")
 
         # 4. Build prompt
         messages = self.context_builder.build_messages(
@@ -194,7 +272,7 @@ class Chatbot:
         )
 
         # 5. Generate via LLM
-        print("[Chatbot] Generating response via LLM...")
+        logger.debug("[Chatbot] Generating response via LLM...")
         raw_output = await self.llm.generate(messages)
 
         # 6. Post-process (pass girl_message for hmm↔mm mirroring)
@@ -203,39 +281,32 @@ class Chatbot:
         # 6.5 Validate output quality
         validation = self.post_processor.validate(processed)
         if not validation["valid"]:
-            print(f"[Chatbot] ⚠ Quality issues: {validation['issues']}")
+            logger.debug("[Chatbot] ⚠ Quality issues: %s", validation["issues"])
+
+        # 7. Store response in history (CRITICAL WRITE 2) — fire-and-forget.
+        # The burst is stored as a list; backends flatten it when needed.
+        logger.debug("[Chatbot] Saving BOT response: %d message(s)", len(processed))
+        self._write_in_background(
+            "save BOT message to DB",
+            self.history.add_message,
+            conversation_id=conv_id,
+            role="assistant",
+            content=processed,
+            metadata={
+                "provider": self.llm.last_used,
+                "raw_output": raw_output[:500],
+                "retrieved_count": len(retrieved),
+            },
+        )
 
-        # 7. Store response in history (CRITICAL WRITE 2)
-        full_response = " [MSG_BREAK] ".join(processed)
-        
-        print(f"[Chatbot] Saving BOT response: '{full_response[:20]}...'")
-        try:
-            self.history.add_message(
+        if self._sheets_enabled:
+            self.sheets_logger.append_message(
                 conversation_id=conv_id,
+                partner_name=partner,
                 role="assistant",
-                content=full_response,
-                metadata={
-                    "provider": self.llm.last_used,
-                    "raw_output": raw_output[:500],
-                    "retrieved_count": len(retrieved),
-                },
+                content=flatten_content(processed),
+                provider=self.llm.last_used or "",
             )
-            print("[Chatbot] ✅ BOT response saved.")
-        except Exception as e:
-            print(f"[Chatbot] ❌ FAILED to save BOT message to DB: {e}")
-            traceback.print_exc()
-
-        if self.sheets_logger.enabled:
-            try:
-                self.sheets_logger.append_message(
-                    conversation_id=conv_id,
-                    partner_name=partner,
-                    role="assistant",
-                    content=full_response,
-                    provider=self.llm.last_used or "",
-                )
-            except Exception as e:
-                print(f"[Chatbot] Sheet logging failed: {e}")
 
         return processed
 
@@ -245,24 +316,21 @@ class Chatbot:
         conversation_id: Optional[str] = None,
         partner_name: Optional[str] = None,
     ) -> list[str]:
-        """Synchronous wrapper around respond()."""
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if loop and loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                future = pool.submit(
-                    asyncio.run,
-                    self.respond(girl_message, conversation_id, partner_name),
-                )
-                return future.result()
-        else:
-            return asyncio.run(
-                self.respond(girl_message, conversation_id, partner_name)
-            )
+        """Synchronous wrapper around respond() (runs on the shared background loop)."""
+        return run_sync(
+            self._respond_and_flush(girl_message, conversation_id, partner_name)
+        )
+
+    async def _respond_and_flush(self, *args) -> list[str]:
+        """respond(), then wait for its background writes.
+
+        Sync callers (the CLI) read history right after a reply, so the
+        writes must have landed before respond_sync() returns.
+        """
+        result = await self.respond(*args)
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks)
+        return result
 
     # ── Interactive CLI ───────────────────────────────────────────────────
 
@@ -348,7 +416,7 @@ class Chatbot:
                 print()
                 for m in msgs:
                     role = "Her" if m["role"] == "user" else "Shreyash"
-                    print(f"  {role}: {m['content'][:80]}")
+                    print(f"  {role}: {flatten_content(m['content'])[:80]}")
                 print()
 
         elif cmd == "/clear":
@@ -368,4 +436,6 @@ class Chatbot:
 
     def close(self):
         """Clean up resources."""
-        self.history.close()
\ No newline at end of file
+        self.history.close()
+        if self._sheets_logger is not None:
+            self._sheets_logger.close()
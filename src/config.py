@@ -28,17 +28,19 @@ HISTORY_DB = DATA_DIR / "history.sqlite3"
 def _load_dotenv():
     """Load .env file from project root if it exists."""
     env_file = ROOT_DIR / ".env"
-    if env_file.exists():
-        with open(env_file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if "=" in line:
-                    key, _, value = line.partition("=")
-                    key = key.strip()
-                    value = value.strip().strip('"').strip("'")
-                    os.environ.setdefault(key, value)
+    try:
+        text = env_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return
+    for line in text.splitlines():
+        # Cheap reject first: most skipped lines are blank or comments
+        if "=" not in line:
+            continue
+        line = line.strip()
+        if line[0] == "#":
+            continue
+        key, _, value = line.partition("=")
+        os.environ.setdefault(key.strip(), value.strip().strip('"').strip("'"))
 
 _load_dotenv()
 
@@ -107,10 +109,14 @@ FIRESTORE_DATABASE = os.environ.get("FIRESTORE_DATABASE", "(default)")
 FIRESTORE_SERVICE_ACCOUNT_JSON = os.environ.get("FIRESTORE_SERVICE_ACCOUNT_JSON", "")
 FIRESTORE_CONVERSATIONS_COLLECTION = os.environ.get("FIRESTORE_CONVERSATIONS_COLLECTION", "conversations")
 FIRESTORE_MESSAGES_COLLECTION = os.environ.get("FIRESTORE_MESSAGES_COLLECTION", "messages")
+FIRESTORE_POOL_SIZE = int(os.environ.get("FIRESTORE_POOL_SIZE", "4"))
 
 SHEETS_SPREADSHEET_ID = os.environ.get("SHEETS_SPREADSHEET_ID", "")
 SHEETS_TAB_NAME = os.environ.get("SHEETS_TAB_NAME", "Sheet1")
 SHEETS_SERVICE_ACCOUNT_JSON = os.environ.get("SHEETS_SERVICE_ACCOUNT_JSON", "")
+# Sheet rows are batched like history writes, but over a longer window:
+# the Sheets API allows ~60 write requests per minute.
+SHEETS_FLUSH_INTERVAL = 1.0
 
 AUTORESPONDER_SHARED_SECRET = os.environ.get("AUTORESPONDER_SHARED_SECRET", "")
 
@@ -122,16 +128,32 @@ def _env_bool(name: str, default: bool = False) -> bool:
 
 USE_FIRESTORE_HISTORY = _env_bool("USE_FIRESTORE_HISTORY", default=False)
 ENABLE_SHEETS_LOG = _env_bool("ENABLE_SHEETS_LOG", default=False)
+# Checkable without importing the Sheets client (googleapiclient is slow)
+SHEETS_LOG_ENABLED = ENABLE_SHEETS_LOG and bool(SHEETS_SPREADSHEET_ID)
 
 # History backend: "sqlite" (local), "firestore", or "mongo" (Render)
 HISTORY_BACKEND = os.environ.get("HISTORY_BACKEND", "sqlite")
 MONGODB_URI = os.environ.get("MONGODB_URI", "")
 MONGODB_DATABASE = os.environ.get("MONGODB_DATABASE", "chatbot")
+MONGODB_MAX_POOL_SIZE = int(os.environ.get("MONGODB_MAX_POOL_SIZE", "32"))
+# Wire compression; pymongo skips zstd (with a warning) if zstandard is missing
+MONGODB_COMPRESSORS = os.environ.get("MONGODB_COMPRESSORS", "zstd")
 
 # Backward compat: honour old USE_FIRESTORE_HISTORY flag
 if USE_FIRESTORE_HISTORY and HISTORY_BACKEND == "sqlite":
     HISTORY_BACKEND = "firestore"
 
+# Firestore/Mongo writes are buffered and committed in batches:
+# flushed after this many seconds, or sooner once a batch is full.
+# 200 messages x 2 ops stays under Firestore's 500-op batch limit.
+HISTORY_FLUSH_INTERVAL = 0.05
+HISTORY_FLUSH_MAX_BATCH = 200
+
+# Recent messages of this many conversations are served from memory.
+# Set to 0 when several instances share one Firestore/Mongo database,
+# since each instance only sees its own writes.
+HISTORY_CACHE_SIZE = int(os.environ.get("HISTORY_CACHE_SIZE", "1000"))
+
 # ─── Model Settings ──────────────────────────────────────────────────────────
 
 # Provider priority order (fallback chain)
@@ -175,6 +197,9 @@ CHROMA_COLLECTION = "ayush_examples"
 # Embedding model for ChromaDB (runs on CPU, ~80MB)
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
+# Query embeddings kept in memory (LRU, keyed by exact message text)
+EMBEDDING_CACHE_SIZE = 2048
+
 # ─── Post-Processor Settings ─────────────────────────────────────────────────
 
 # Max characters per single message in a burst
@@ -10,9 +10,16 @@ Assembles the full prompt for the LLM by combining:
 This is the brain that decides exactly what context the LLM sees.
 """
 
-import json
-from datetime import datetime
+import calendar
+import functools
+import itertools
+import operator
+import sys
+from datetime import datetime, time
 from pathlib import Path
+from typing import Sequence
+
+import orjson
 
 from src.config import (
     STYLE_BIBLE_FILE,
@@ -22,190 +29,20 @@ from src.config import (
 )
 
 
-class ContextBuilder:
-    """Builds LLM prompts from style bible + examples + history."""
-
-    def __init__(self, style_bible_path: Path = None, people_path: Path = None):
-        self._bible = None
-        self._bible_path = style_bible_path or STYLE_BIBLE_FILE
-        self._people = None
-        self._people_path = people_path or PEOPLE_FILE
-
-    # ── Style Bible ───────────────────────────────────────────────────────
-
-    @property
-    def style_bible(self) -> dict:
-        """Lazy-load the style bible."""
-        if self._bible is None:
-            with open(self._bible_path, "r", encoding="utf-8") as f:
-                self._bible = json.load(f)
-        return self._bible
-
-    @property
-    def people_data(self) -> dict:
-        """Lazy-load partner profiles."""
-        if self._people is None:
-            try:
-                with open(self._people_path, "r", encoding="utf-8") as f:
-                    self._people = json.load(f)
-            except FileNotFoundError:
-                self._people = {}
-        return self._people
-
-    def _find_partner_profile(self, partner_name: str) -> tuple[str, dict] | None:
-        if not partner_name:
-            return None
-        people = self.people_data or {}
-        partners = people.get("partners", {})
-        needle = partner_name.strip().lower()
-        for name, info in partners.items():
-            aliases = [name] + info.get("aliases", [])
-            if any(needle == a.lower() for a in aliases if isinstance(a, str)):
-                return name, info
-        return None
-
-    def _render_personal_context(self, partner_name: str) -> str:
-        people = self.people_data or {}
-        self_info = people.get("self", {})
-        profile = self._find_partner_profile(partner_name)
-        if not self_info and not profile:
-            return ""
-
-        lines = ["═══ PERSONAL CONTEXT ═══"]
-        if self_info:
-            lines.append("You are Shreyash:")
-            if self_info.get("study"):
-                lines.append(f"• Study: {self_info['study']}")
-            traits = self_info.get("traits", [])
-            if traits:
-                lines.append("• Traits: " + ", ".join(traits))
-            tone_notes = self_info.get("tone_notes", [])
-            if tone_notes:
-                lines.append("• Tone: " + "; ".join(tone_notes))
-
-        if profile:
-            name, info = profile
-            lines.append(f"Talking to: {name}")
-            if info.get("relationship"):
-                lines.append(f"• Relationship: {info['relationship']}")
-            if info.get("current"):
-                lines.append(f"• Current: {info['current']}")
-            if info.get("age"):
-                lines.append(f"• Age: {info['age']}")
-            if info.get("birthday"):
-                lines.append(f"• Birthday: {info['birthday']}")
-            if info.get("family"):
-                lines.append(f"• Family: {info['family']}")
-            if info.get("interests"):
-                lines.append("• Interests: " + ", ".join(info["interests"]))
-            if info.get("personality"):
-                lines.append("• Personality: " + ", ".join(info["personality"]))
-            if info.get("behavior"):
-                lines.append("• Behavior: " + ", ".join(info["behavior"]))
-            if info.get("nicknames"):
-                lines.append("• Nicknames you use for her: " + ", ".join(info["nicknames"]))
-            if info.get("inside_jokes"):
-                lines.append("• Inside jokes between you two: " + "; ".join(info["inside_jokes"]))
-            if info.get("friends"):
-                lines.append("• Mutual/her friends: " + ", ".join(info["friends"]))
-            if info.get("history"):
-                lines.append(f"• Background: {info['history']}")
-            if info.get("conversation_notes"):
-                lines.append("• Notes: " + "; ".join(info["conversation_notes"]))
-            if info.get("tone_preference"):
-                lines.append("• Tone rules: " + "; ".join(info["tone_preference"]))
-            if info.get("do_not_mention"):
-                lines.append("• Do NOT mention: " + ", ".join(info["do_not_mention"]))
-
-        return "\n".join(lines)
-
-    # ── System Prompt ─────────────────────────────────────────────────────
-
-    def build_system_prompt(self, partner_name: str = "a girl") -> str:
-        """
-        Build a comprehensive system prompt from the style bible.
-        Encodes ALL of Shreyash's texting rules so the LLM can replicate them.
-        """
-        bible = self.style_bible
-
-        # Extract top spelling rules
-        spelling_rules = []
-        for word, info in bible.get("spelling_map", {}).items():
-            if info.get("confirmed") and info.get("ayush_count", 0) > 10:
-                spelling_rules.append(
-                    f'"{word}" NOT "{info["standard_form"]}"'
-                )
-
-        # Extract greetings
-        morning = bible.get("greetings_and_closings", {}).get("morning_greetings", [])
-        night = bible.get("greetings_and_closings", {}).get("night_closings", [])
-        morning_top = morning[0]["text"] if morning else "Good morning 🌄🌄🌄"
-        night_top = night[0]["text"] if night else "Good night 🌉🌉🌉"
-
-        # Extract short responses
-        short_resp = bible.get("short_responses", {}).get("top_short_responses", [])
-        short_list = [r["text"] for r in short_resp[:8]]
-
-        # Message length stats
-        lengths = bible.get("message_lengths", {})
-        avg_chars = lengths.get("char_length", {}).get("mean", 24)
-        median_chars = lengths.get("char_length", {}).get("median", 16)
-        avg_words = lengths.get("word_count", {}).get("mean", 5.5)
-
-        # Burst patterns
-        bursts = bible.get("burst_patterns", {})
-        avg_burst = bursts.get("avg_burst_length", 1.6)
-        multi_pct = bursts.get("multi_message_pct", 39)
-
-        # Time + day awareness
-        now = datetime.now()
-        hour = now.hour
-        day_name = now.strftime("%A")
-        weekday = now.weekday()  # 0=Mon, 6=Sun
-
-        if 5 <= hour < 12:
-            time_context = "morning"
-        elif 12 <= hour < 17:
-            time_context = "afternoon"
-        elif 17 <= hour < 21:
-            time_context = "evening"
-        else:
-            time_context = "late night"
-
-        # Shreyash's college schedule:
-        # Mon, Tue, Wed, Fri = college 8 AM - 2 PM
-        # Thu, Sat, Sun = holiday
-        college_days = {0, 1, 2, 4}  # Mon, Tue, Wed, Fri
-        is_college_day = weekday in college_days
-        in_class = is_college_day and 8 <= hour < 14
-
-        if in_class:
-            activity_context = "in college class right now (might reply late)"
-        elif is_college_day and hour < 8:
-            activity_context = "getting ready for college"
-        elif is_college_day and 14 <= hour < 16:
-            activity_context = "just got back from college, in PG"
-        elif is_college_day:
-            activity_context = "at PG, free after college"
-        elif weekday == 3:
-            activity_context = "holiday today (no college on Thursday), chilling at PG"
-        elif weekday == 5:
-            activity_context = "weekend, no college today, at PG"
-        else:
-            activity_context = "Sunday, full holiday, at PG"
-
-        system = f"""You are Shreyash ("I Am All"), a Hinglish-speaking Indian guy chatting with {partner_name}. You MUST perfectly replicate Shreyash's exact texting style. Your responses should be INDISTINGUISHABLE from the real Shreyash.
+# System prompt rendered with str.format_map(), once per
+# (partner, weekday, hour) — see ContextBuilder.build_system_prompt().
+_SYSTEM_TEMPLATE = """You are Shreyash ("I Am All"), a Hinglish-speaking Indian guy chatting with {partner_name}. You MUST perfectly replicate Shreyash's exact texting style. Your responses should be INDISTINGUISHABLE from the real Shreyash.
 
 ═══ SPELLING RULES (MANDATORY — NEVER VIOLATE) ═══
 Use EXACTLY these spellings. NEVER use the standard form:
-{chr(10).join(f'• {rule}' for rule in spelling_rules[:20])}
+{spelling_rules_block}
 
 ═══ MESSAGE FORMAT ═══
 • Keep messages SHORT: ~{avg_chars:.0f} chars, ~{avg_words:.0f} words (median {median_chars} chars)
 • {multi_pct:.0f}% of your replies are multi-message bursts (avg {avg_burst:.1f} msgs)
 • Use [MSG_BREAK] between separate messages in a burst
 • Example burst: "Ha sahi h [MSG_BREAK] Me bhi esa hi sochta tha [MSG_BREAK] Ab chod"
-• Single-word responses are common: {', '.join(f'"{s}"' for s in short_list[:6])}
+• Single-word responses are common: {short_list_inline}
 • NEVER write long paragraphs. Break thoughts into rapid-fire short messages.
 
 ═══ EMOJI RULES (CRITICAL — READ CAREFULLY) ═══
@@ -240,8 +77,8 @@ Use EXACTLY these spellings. NEVER use the standard form:
 ═══ GREETINGS & SCHEDULE ═══
 • Morning: "{morning_top}" (exact format, with emojis)
 • Night: "{night_top}" (exact format, with emojis)
-• Current time: {time_context} ({now.strftime("%I:%M %p")}), {day_name}
-• Today: {"College day (Mon/Tue/Wed/Fri 8AM-2PM)" if is_college_day else "Holiday (no college)"}
+• Current time: {time_context} ({clock}), {day_name}
+• Today: {today}
 • Right now: {activity_context}
 • When asked "kkrh?" or "kya kar rha?", answer based on your ACTUAL current activity above. Vary your answers — don't always say the same thing.
 
@@ -276,12 +113,350 @@ Use EXACTLY these spellings. NEVER use the standard form:
 • "Kkrh" and "Tp" are ONLY valid when she asks what you're doing, NOT as random filler.
 • Each response must DIRECTLY address what she just said."""
 
+# Personal-context rows: (people.json key, label, joiner for list values).
+# A joiner of None means the value is a plain string.
+_SELF_FIELDS = (
+    ("study", "Study", None),
+    ("traits", "Traits", ", "),
+    ("tone_notes", "Tone", "; "),
+)
+_PROFILE_FIELDS = (
+    ("relationship", "Relationship", None),
+    ("current", "Current", None),
+    ("age", "Age", None),
+    ("birthday", "Birthday", None),
+    ("family", "Family", None),
+    ("interests", "Interests", ", "),
+    ("personality", "Personality", ", "),
+    ("behavior", "Behavior", ", "),
+    ("nicknames", "Nicknames you use for her", ", "),
+    ("inside_jokes", "Inside jokes between you two", "; "),
+    ("friends", "Mutual/her friends", ", "),
+    ("history", "Background", None),
+    ("conversation_notes", "Notes", "; "),
+    ("tone_preference", "Tone rules", "; "),
+    ("do_not_mention", "Do NOT mention", ", "),
+)
+
+_EXAMPLES_HEADER = (
+    "═══ REFERENCE EXAMPLES (Shreyash's real replies in similar situations) ═══\n"
+    "Study these and match the EXACT style, length, and tone:\n\n"
+)
+
+# ChatML keys/roles, interned once and shared by every message dict built here
+_ROLE_KEY = sys.intern("role")
+_CONTENT_KEY = sys.intern("content")
+_ROLE_SYSTEM = sys.intern("system")
+_ROLE_USER = sys.intern("user")
+
+_CHATML_KEYS = frozenset((_ROLE_KEY, _CONTENT_KEY))
+_get_content = operator.itemgetter(_CONTENT_KEY)
+
+# Shreyash's college schedule:
+# Mon, Tue, Wed, Fri = college 8 AM - 2 PM
+# Thu, Sat, Sun = holiday
+_COLLEGE_DAYS = frozenset({0, 1, 2, 4})  # Mon, Tue, Wed, Fri
+
+# Time of day by hour: 5-11 morning, 12-16 afternoon, 17-20 evening
+_TIME_CTX = (
+    ("late night",) * 5 + ("morning",) * 7 + ("afternoon",) * 5
+    + ("evening",) * 4 + ("late night",) * 3
+)
+
+
+def _activity_for(weekday: int, hour: int) -> str:
+    is_college_day = weekday in _COLLEGE_DAYS
+    if is_college_day and 8 <= hour < 14:
+        return "in college class right now (might reply late)"
+    if is_college_day and hour < 8:
+        return "getting ready for college"
+    if is_college_day and 14 <= hour < 16:
+        return "just got back from college, in PG"
+    if is_college_day:
+        return "at PG, free after college"
+    if weekday == 3:
+        return "holiday today (no college on Thursday), chilling at PG"
+    if weekday == 5:
+        return "weekend, no college today, at PG"
+    return "Sunday, full holiday, at PG"
+
+
+# What Shreyash is doing, for every (weekday, hour) slot
+_ACTIVITY_CTX = {
+    (weekday, hour): _activity_for(weekday, hour)
+    for weekday in range(7)
+    for hour in range(24)
+}
+
+
+
+def display_text(text: str) -> str:
+    """Burst separators as shown in few-shot examples ("a → b").
+
+    Plain str.replace: for this one literal token it is ~2x faster than a
+    precompiled re.sub.
+    """
+    return text.replace("[MSG_BREAK]", " → ")
+
+
+def partner_key(name: str) -> str:
+    """Normalised lookup key for a partner name or alias."""
+    return name.strip().casefold()
+
+
+def build_partner_index(people: dict) -> dict[str, tuple[str, dict]]:
+    """Map partner_key(name/alias) → (canonical name, profile)."""
+    index = {}
+    for name, info in people.get("partners", {}).items():
+        for alias in [name, *info.get("aliases", [])]:
+            if isinstance(alias, str):
+                # First partner wins on duplicate aliases (same as the old scan)
+                index.setdefault(sys.intern(partner_key(alias)), (sys.intern(name), info))
+    return index
+
+
+def _render_fields(info: dict, fields: tuple) -> list[str]:
+    """Bullet lines for the truthy fields of a profile, in table order."""
+    get = info.get
+    return [
+        f"• {label}: {sep.join(value) if sep else value}"
+        for key, label, sep in fields
+        if (value := get(key))
+    ]
+
+
+class ContextBuilder:
+    """Builds LLM prompts from style bible + examples + history."""
+
+    # Parsed JSON shared by every instance (and by PostProcessor), keyed by
+    # file path, so nothing re-reads it. Cleared via invalidate()/reload().
+    # people.json is also re-read when its mtime changes, since it is edited
+    # while the API is running: path → (mtime_ns, data, partner index).
+    _BIBLE_CACHE: dict[Path, dict] = {}
+    _PEOPLE_CACHE: dict[Path, tuple[int | None, dict, dict]] = {}
+
+    def __init__(self, style_bible_path: Path = None, people_path: Path = None):
+        self._bible = None
+        self._bible_derived = None
+        self._bible_path = Path(style_bible_path or STYLE_BIBLE_FILE)
+        self._people = None
+        self._partner_index: dict[str, tuple[str, dict]] = {}
+        self._people_path = Path(people_path or PEOPLE_FILE)
+
+        # The prompt only changes with (partner, weekday, hour): cache it
+        self._build_system_prompt_cached = functools.lru_cache(maxsize=64)(
+            self._render_system_prompt
+        )
+        # Finished {"role": "system"} dicts for the same key, shared between
+        # calls (the LLM clients only read messages, never mutate them)
+        self._system_message_cached = functools.lru_cache(maxsize=64)(
+            self._make_system_message
+        )
+        # Personal-context block per normalised partner name; cleared
+        # whenever people.json is (re)loaded.
+        self._personal_context_cached = functools.lru_cache(maxsize=64)(
+            self._render_personal_context_uncached
+        )
+
+    def reload(self):
+        """Drop loaded JSON and cached prompts (after editing the config files)."""
+        self.invalidate(self._bible_path)
+        self.invalidate(self._people_path)
+        self._bible = None
+        self._bible_derived = None
+        self._people = None
+        self._partner_index = {}
+        self._build_system_prompt_cached.cache_clear()
+        self._system_message_cached.cache_clear()
+        self._personal_context_cached.cache_clear()
+
+    @classmethod
+    def invalidate(cls, path: Path = None):
+        """Forget the shared parsed copy of `path` (or of every file)."""
+        if path is None:
+            cls._BIBLE_CACHE.clear()
+            cls._PEOPLE_CACHE.clear()
+            return
+        path = Path(path)
+        cls._BIBLE_CACHE.pop(path, None)
+        cls._PEOPLE_CACHE.pop(path, None)
+
+    # ── Style Bible ───────────────────────────────────────────────────────
+
+    @classmethod
+    def load_style_bible(cls, path: Path) -> dict:
+        """Parsed style bible at `path`, read once per process."""
+        bible = cls._BIBLE_CACHE.get(path)
+        if bible is None:
+            bible = orjson.loads(path.read_bytes())
+            cls._BIBLE_CACHE[path] = bible
+        return bible
+
+    @property
+    def style_bible(self) -> dict:
+        """Lazy-load the style bible."""
+        if self._bible is None:
+            self._bible = self.load_style_bible(self._bible_path)
+            self._bible_derived = self._precompute_bible_fields(self._bible)
+        return self._bible
+
+    @staticmethod
+    def _precompute_bible_fields(bible: dict) -> dict:
+        """Prompt values derived from the bible — computed once per load."""
+        # Extract top spelling rules: confirmed, seen >10 times, most used
+        # first — only the top 20 make it into the prompt
+        confirmed = [
+            (word, info)
+            for word, info in bible.get("spelling_map", {}).items()
+            if info.get("confirmed") and info.get("ayush_count", 0) > 10
+        ]
+        confirmed.sort(key=lambda pair: pair[1]["ayush_count"], reverse=True)
+        spelling_rules = [
+            f'"{word}" NOT "{info["standard_form"]}"' for word, info in confirmed[:20]
+        ]
+
+        # Extract greetings
+        morning = bible.get("greetings_and_closings", {}).get("morning_greetings", [])
+        night = bible.get("greetings_and_closings", {}).get("night_closings", [])
+
+        # Extract short responses
+        short_resp = bible.get("short_responses", {}).get("top_short_responses", [])
+
+        # Message length stats + burst patterns
+        lengths = bible.get("message_lengths", {})
+        bursts = bible.get("burst_patterns", {})
+
+        short_list = [r["text"] for r in short_resp[:8]]
+
+        return {
+            "spelling_rules": spelling_rules,
+            "spelling_rules_block": "\n".join(f"• {rule}" for rule in spelling_rules),
+            "morning_top": morning[0]["text"] if morning else "Good morning 🌄🌄🌄",
+            "night_top": night[0]["text"] if night else "Good night 🌉🌉🌉",
+            "short_list": short_list,
+            "short_list_inline": ", ".join(f'"{s}"' for s in short_list[:6]),
+            "avg_chars": lengths.get("char_length", {}).get("mean", 24),
+            "median_chars": lengths.get("char_length", {}).get("median", 16),
+            "avg_words": lengths.get("word_count", {}).get("mean", 5.5),
+            "avg_burst": bursts.get("avg_burst_length", 1.6),
+            "multi_pct": bursts.get("multi_message_pct", 39),
+        }
+
+    @property
+    def bible_derived(self) -> dict:
+        """Precomputed style-bible fields (loads the bible if needed)."""
+        if self._bible_derived is None:
+            self._bible_derived = self._precompute_bible_fields(self.style_bible)
+        return self._bible_derived
+
+    @classmethod
+    def load_people(cls, path: Path) -> tuple[dict, dict[str, tuple[str, dict]]]:
+        """Parsed people.json at `path` and its partner index (see partner_key)."""
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        cached = cls._PEOPLE_CACHE.get(path)
+        if cached is None or cached[0] != mtime:
+            data = {}
+            if mtime is not None:
+                try:
+                    data = orjson.loads(path.read_bytes())
+                except FileNotFoundError:
+                    pass
+            cached = (mtime, data, build_partner_index(data))
+            cls._PEOPLE_CACHE[path] = cached
+        return cached[1], cached[2]
+
+    @property
+    def people_data(self) -> dict:
+        """Partner profiles; picks up edits to people.json."""
+        people, index = self.load_people(self._people_path)
+        if people is not self._people:
+            self._people = people
+            self._partner_index = index
+            # Rendered prompts embed the old profiles
+            self._personal_context_cached.cache_clear()
+            self._build_system_prompt_cached.cache_clear()
+            self._system_message_cached.cache_clear()
+        return people
+
+    def _find_partner_profile(self, partner_name: str) -> tuple[str, dict] | None:
+        if not partner_name:
+            return None
+        self.people_data   # ensure the index is built
+        return self._partner_index.get(partner_key(partner_name))
+
+    def _render_personal_context(self, partner_name: str) -> str:
+        return self._personal_context_cached(partner_key(partner_name or ""))
+
+    def _render_personal_context_uncached(self, partner_key: str) -> str:
+        people = self.people_data or {}
+        self_info = people.get("self", {})
+        profile = self._find_partner_profile(partner_key)
+        if not self_info and not profile:
+            return ""
+
+        lines = ["═══ PERSONAL CONTEXT ═══"]
+        if self_info:
+            lines.append("You are Shreyash:")
+            lines.extend(_render_fields(self_info, _SELF_FIELDS))
+
+        if profile:
+            name, info = profile
+            lines.append(f"Talking to: {name}")
+            lines.extend(_render_fields(info, _PROFILE_FIELDS))
+
+        return "\n".join(lines)
+
+    # ── System Prompt ─────────────────────────────────────────────────────
+
+    def build_system_prompt(self, partner_name: str = "a girl") -> str:
+        """
+        Build a comprehensive system prompt from the style bible.
+        Encodes ALL of Shreyash's texting rules so the LLM can replicate them.
+        """
+        # The clock is floored to the hour, so the prompt is byte-identical
+        # for a whole hour: one cached string per (partner, weekday, hour),
+        # and a stable prefix for provider-side prompt caching.
+        self.people_data   # drop cached prompts if people.json changed
+        now = datetime.now()
+        return self._build_system_prompt_cached(partner_name, now.weekday(), now.hour)
+
+    def _render_system_prompt(self, partner_name: str, weekday: int, hour: int) -> str:
+        """Render the template for one (partner, weekday, hour)."""
+        ctx = {
+            **self.bible_derived,
+            **self._schedule_context(weekday, hour),
+            "partner_name": partner_name,
+            "clock": time(hour).strftime("%I:00 %p"),
+        }
+        system = _SYSTEM_TEMPLATE.format_map(ctx)
+
         personal_context = self._render_personal_context(partner_name)
         if personal_context:
             system += "\n\n" + personal_context
 
         return system
 
+    def _make_system_message(self, partner_name: str, weekday: int, hour: int) -> dict:
+        return {
+            _ROLE_KEY: _ROLE_SYSTEM,
+            _CONTENT_KEY: self._build_system_prompt_cached(partner_name, weekday, hour),
+        }
+
+    @staticmethod
+    def _schedule_context(weekday: int, hour: int) -> dict:
+        """Time-of-day, college-day and activity values for the prompt."""
+        # weekday: 0=Mon, 6=Sun
+        is_college_day = weekday in _COLLEGE_DAYS
+        return {
+            "time_context": _TIME_CTX[hour],
+            "day_name": calendar.day_name[weekday],
+            "today": "College day (Mon/Tue/Wed/Fri 8AM-2PM)" if is_college_day else "Holiday (no college)",
+            "activity_context": _ACTIVITY_CTX[weekday, hour],
+        }
+
     # ── Few-Shot Examples ─────────────────────────────────────────────────
 
     def format_examples(self, retrieved: list[dict], max_examples: int = None) -> str:
@@ -301,20 +476,13 @@ Use EXACTLY these spellings. NEVER use the standard form:
         n = max_examples or RETRIEVAL_TOP_K
         examples = retrieved[:n]
 
-        lines = ["═══ REFERENCE EXAMPLES (Shreyash's real replies in similar situations) ═══"]
-        lines.append("Study these and match the EXACT style, length, and tone:\n")
-
-        for i, ex in enumerate(examples, 1):
-            ctx = ex["context"].replace("[MSG_BREAK]", " → ")
-            resp = ex["response"].replace("[MSG_BREAK]", " → ")
-            cats = ", ".join(ex.get("categories", []))
-
-            lines.append(f"Example {i} [{cats}]:")
-            lines.append(f"  Her: {ctx}")
-            lines.append(f"  Shreyash: {resp}")
-            lines.append("")
-
-        return "\n".join(lines)
+        # One f-string per example (3 lines + blank), joined once
+        return _EXAMPLES_HEADER + "\n".join(
+            f"Example {i} [{', '.join(ex.get('categories', ()))}]:\n"
+            f"  Her: {ex.get('display_context') or display_text(ex['context'])}\n"
+            f"  Shreyash: {ex.get('display_response') or display_text(ex['response'])}\n"
+            for i, ex in enumerate(examples, 1)
+        )
 
     # ── Full Prompt Assembly ──────────────────────────────────────────────
 
@@ -322,7 +490,7 @@ Use EXACTLY these spellings. NEVER use the standard form:
         self,
         girl_message: str,
         partner_name: str = "a girl",
-        history: list[dict] = None,
+        history: Sequence[dict] = None,
         retrieved_examples: list[dict] = None,
     ) -> list[dict]:
         """
@@ -336,7 +504,8 @@ Use EXACTLY these spellings. NEVER use the standard form:
         Args:
             girl_message: The girl's latest message to respond to
             partner_name: Name of the chat partner for system prompt
-            history: Recent ChatML turns from ConversationHistory
+            history: Recent ChatML turns from ConversationHistory — a list,
+                or a deque(maxlen=HISTORY_WINDOW) the caller keeps bounded
             retrieved_examples: Similar examples from VectorStore
 
         Returns:
@@ -344,29 +513,35 @@ Use EXACTLY these spellings. NEVER use the standard form:
         """
         messages = []
 
-        # 1. System prompt
-        system_text = self.build_system_prompt(partner_name)
-
-        # 2. Attach few-shot examples to system prompt
-        if retrieved_examples:
-            examples_text = self.format_examples(retrieved_examples)
-            if examples_text:
-                system_text += "\n\n" + examples_text
-
-        messages.append({"role": "system", "content": system_text})
+        # 1. System prompt + 2. few-shot examples attached to it
+        examples_text = self.format_examples(retrieved_examples)
+        if examples_text:
+            system_text = self.build_system_prompt(partner_name) + "\n\n" + examples_text
+            messages.append({_ROLE_KEY: _ROLE_SYSTEM, _CONTENT_KEY: system_text})
+        else:
+            # No examples: reuse the cached system message object as-is
+            self.people_data
+            now = datetime.now()
+            messages.append(
+                self._system_message_cached(partner_name, now.weekday(), now.hour)
+            )
 
         # 3. Conversation history
         if history:
-            # Limit to HISTORY_WINDOW turns
-            recent = history[-HISTORY_WINDOW:]
-            for turn in recent:
-                messages.append({
-                    "role": turn["role"],
-                    "content": turn["content"],
-                })
+            # Limit to HISTORY_WINDOW turns. ChatML-shaped turns (as returned
+            # by get_recent_as_chatml) are reused as-is; only turns carrying
+            # extra keys get copied down to role + content.
+            messages.extend([
+                turn if turn.keys() == _CHATML_KEYS
+                else {_ROLE_KEY: sys.intern(turn[_ROLE_KEY]), _CONTENT_KEY: turn[_CONTENT_KEY]}
+                # islice works for lists and deques alike, without a slice copy
+                for turn in itertools.islice(
+                    history, max(0, len(history) - HISTORY_WINDOW), None
+                )
+            ])
 
         # 4. Girl's latest message
-        messages.append({"role": "user", "content": girl_message})
+        messages.append({_ROLE_KEY: _ROLE_USER, _CONTENT_KEY: girl_message})
 
         return messages
 
@@ -375,5 +550,5 @@ Use EXACTLY these spellings. NEVER use the standard form:
     @staticmethod
     def estimate_tokens(messages: list[dict]) -> int:
         """Rough token estimate (~4 chars per token for Hinglish)."""
-        total_chars = sum(len(m["content"]) for m in messages)
+        total_chars = sum(map(len, map(_get_content, messages)))
         return total_chars // 4
@@ -8,10 +8,112 @@ the LLM gets wrong.
 """
 
 import re
-import json
 from pathlib import Path
 
 from src.config import STYLE_BIBLE_FILE, MAX_MSG_CHARS, MAX_BURST_SIZE
+from src.engine.context_builder import ContextBuilder
+
+
+# ── Compiled Patterns ─────────────────────────────────────────────────────
+# Built once at import; the per-message steps below only call .sub()/.match().
+
+# Hard-coded high-priority spelling replacements (most impactful):
+# standard form → Shreyash's form, matched as whole words, any case.
+_SPELL_MAP = {
+    "hai": "h",
+    "hain": "h",
+    "aur": "Or",
+    "haan": "Ha",
+    "haa": "Ha",
+    "accha": "aacha",
+    "achha": "aacha",
+    "acha": "aacha",
+    "pehle": "phele",
+    "pahle": "phele",
+    "kuch": "kyuch",
+    "theek": "thik",
+    "toh": "to",
+    "kaisi": "kesi",
+    "karo": "kro",
+    "karta": "krta",
+    "karti": "krti",
+    "karna": "krna",
+    "karne": "krne",
+    "batao": "btao",
+    "mein": "me",       # "mein" → "me"
+    "okay": "Ook",
+    # Casual abbreviations
+    "kya kar raha": "kkrh",
+    "kya kar rahi": "kkrh",
+    "kya kr raha": "kkrh",
+    "kya kr rahi": "kkrh",
+    "time pass": "tp",
+    "timepass": "tp",
+}
+# Case-sensitive rules: "Ok"/"ok" are rewritten, "OK" is left alone
+_SPELL_EXACT = {
+    "Ok": "Ook",
+    "ok": "ook",
+}
+
+# All rules fused into one alternation, so a message is scanned once
+# instead of once per rule. Longest first, so "haan" wins over "haa".
+_SPELL_RE = re.compile(
+    r"\b(?:"
+    + "|".join(map(re.escape, sorted({*_SPELL_MAP, *_SPELL_EXACT}, key=len, reverse=True)))
+    + r")\b",
+    re.IGNORECASE,
+)
+
+
+# The casings the LLM actually produces, resolved up front so most matches
+# are a single dict hit; anything else ("hAi") falls back to .lower().
+_SPELL_VARIANTS = {
+    variant: replacement
+    for word, replacement in _SPELL_MAP.items()
+    for variant in (word, word.capitalize(), word.upper(), word.title())
+}
+_SPELL_VARIANTS.update(_SPELL_EXACT)
+
+
+def _spell_replacement(match: re.Match) -> str:
+    word = match.group(0)
+    return _SPELL_VARIANTS.get(word) or _SPELL_MAP.get(word.lower(), word)
+
+
+# Standard spellings that validate() flags if they survive processing
+_LEAKED_WORDS = ("hai", "aur", "haan", "accha", "pehle", "toh", "theek")
+_LEAKED_RE = re.compile(r"\b(?:" + "|".join(_LEAKED_WORDS) + r")\b", re.IGNORECASE)
+
+# Words that should stay capitalized as written
+_PRESERVE_CAPS = frozenset({
+    "Or", "Ha", "Hmm", "Ook", "Good", "BGMI", "Nahi",
+    "Hi", "Hello", "Hey", "Bye", "OK", "Tu", "Me",
+    "Ye", "Vo", "Ab", "Abhi", "Kya", "Aacha", "Sahi",
+    "To", "Phir", "Bol", "Bata", "De", "Kar", "Le",
+})
+
+# Role prefixes the LLM might hallucinate ("Shreyash:", "Ayush -", ...)
+_ROLE_PREFIX_RE = re.compile(
+    r"(?:shreyash|ayush|i am all|me|assistant|response):|(?:shreyash|ayush|i am all) -",
+    re.IGNORECASE,
+)
+
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")   # **bold**
+_ITALIC_RE = re.compile(r"\*(.+?)\*")       # *italic*
+_UNDERLINE_RE = re.compile(r"_(.+?)_")       # _underline_
+# Explanation text in parentheses at the end
+_EXPLANATION_RE = re.compile(
+    r'\s*\(.*?(replying|responding|teasing|joking).*?\)\s*$', re.I
+)
+
+_MULTI_BANG_RE = re.compile(r"!{2,}")
+_MULTI_QUESTION_RE = re.compile(r"\?{2,}")
+_MULTI_DOT_RE = re.compile(r"\.{3,}")
+_MULTI_COMMA_RE = re.compile(r",{2,}")
+
+_HMM_RE = re.compile(r'^h+m+$')
+_MM_RE = re.compile(r'^m+$')
 
 
 class PostProcessor:
@@ -19,7 +121,7 @@ class PostProcessor:
 
     def __init__(self, style_bible_path: Path = None):
         self._bible = None
-        self._bible_path = style_bible_path or STYLE_BIBLE_FILE
+        self._bible_path = Path(style_bible_path or STYLE_BIBLE_FILE)
         self._spelling_map = None
 
     # ── Style Bible ───────────────────────────────────────────────────────
@@ -27,8 +129,8 @@ class PostProcessor:
     @property
     def style_bible(self) -> dict:
         if self._bible is None:
-            with open(self._bible_path, "r", encoding="utf-8") as f:
-                self._bible = json.load(f)
+            # Same dict the ContextBuilder uses — parsed once per process
+            self._bible = ContextBuilder.load_style_bible(self._bible_path)
         return self._bible
 
     @property
@@ -67,19 +169,22 @@ class PostProcessor:
         # 1. Split into burst messages
         messages = self._split_burst(raw_output)
 
+        # Normalised once for every message in the burst
+        girl_lower = girl_message.lower().strip() if girl_message else ""
+
         # 2-8. Process each message
         processed = []
         for msg in messages:
             msg = self._clean_artifacts(msg)
             msg = self._apply_spelling(msg)
-            if girl_message:
-                msg = self._apply_mirroring(msg, girl_message)
+            if girl_lower:
+                msg = self._apply_mirroring(msg, girl_lower)
             msg = self._fix_capitalization(msg)
             msg = self._enforce_length(msg)
-            msg = self._clean_punctuation(msg)
-            
-            if msg.strip():
-                processed.append(msg.strip())
+            msg = self._clean_punctuation(msg)   # returns it stripped
+
+            if msg:
+                processed.append(msg)
 
         # Enforce burst size limit
         if len(processed) > MAX_BURST_SIZE:
@@ -91,24 +196,24 @@ class PostProcessor:
 
         return processed
 
-    def _apply_mirroring(self, text: str, girl_message: str) -> str:
+    def _apply_mirroring(self, text: str, girl_lower: str) -> str:
         """
         Apply hmm↔mm mirroring based on what the girl said.
         If she says "hmm", we reply with "mm" and vice versa.
+        `girl_lower` is her message already lowercased and stripped.
         """
-        girl_lower = girl_message.lower().strip()
-        text_lower = text.lower().strip()
-        
         # If girl said "hmm" (or variations) and we're about to say "hmm", change to "mm"
-        if re.match(r'^h+m+$', girl_lower):
-            if re.match(r'^h+m+$', text_lower):
+        if _HMM_RE.match(girl_lower):
+            if _HMM_RE.match(text.lower().strip()):
                 return "Mm"
-        
+            return text
+
         # If girl said "mm" and we're about to say "mm", change to "hmm"
-        if re.match(r'^m+$', girl_lower):
-            if re.match(r'^m+$', text_lower) or re.match(r'^h+m+$', text_lower):
+        if _MM_RE.match(girl_lower):
+            text_lower = text.lower().strip()
+            if _MM_RE.match(text_lower) or _HMM_RE.match(text_lower):
                 return "Hmm"
-        
+
         return text
 
     def process_to_string(self, raw_output: str, girl_message: str = None) -> str:
@@ -143,20 +248,13 @@ class PostProcessor:
     def _clean_artifacts(self, text: str) -> str:
         """Remove common LLM-generated artifacts."""
         # Remove role prefixes the LLM might hallucinate
-        prefixes_to_strip = [
-            "Shreyash:", "Ayush:", "I Am All:", "Me:", "Assistant:",
-            "shreyash:", "ayush:", "i am all:", "me:", "assistant:",
-            "Response:", "response:",
-            "Shreyash -", "Ayush -", "I Am All -",
-        ]
-        for prefix in prefixes_to_strip:
-            if text.startswith(prefix):
-                text = text[len(prefix):].strip()
+        while (prefix := _ROLE_PREFIX_RE.match(text)):
+            text = text[prefix.end():].strip()
 
         # Remove markdown formatting
-        text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)  # **bold**
-        text = re.sub(r"\*(.+?)\*", r"\1", text)       # *italic*
-        text = re.sub(r"_(.+?)_", r"\1", text)         # _underline_
+        text = _BOLD_RE.sub(r"\1", text)
+        text = _ITALIC_RE.sub(r"\1", text)
+        text = _UNDERLINE_RE.sub(r"\1", text)
 
         # Remove quotes the LLM might add
         if text.startswith('"') and text.endswith('"'):
@@ -165,7 +263,7 @@ class PostProcessor:
             text = text[1:-1]
 
         # Remove explanation text in parentheses at the end
-        text = re.sub(r'\s*\(.*?(replying|responding|teasing|joking).*?\)\s*$', '', text, flags=re.I)
+        text = _EXPLANATION_RE.sub('', text)
 
         return text.strip()
 
@@ -176,53 +274,7 @@ class PostProcessor:
         Replace standard Hinglish spellings with Shreyash's versions.
         Uses word-boundary matching to avoid partial replacements.
         """
-        # Hard-coded high-priority replacements (most impactful)
-        # These are case-sensitive and carefully ordered
-        priority_replacements = [
-            # (pattern, replacement, flags)
-            (r'\bhai\b', 'h', re.IGNORECASE),
-            (r'\bhain\b', 'h', re.IGNORECASE),
-            (r'\baur\b', 'Or', re.IGNORECASE),
-            (r'\bhaan\b', 'Ha', re.IGNORECASE),
-            (r'\bhaa\b', 'Ha', re.IGNORECASE),
-            (r'\bnahi\b', 'nahi', 0),           # Keep as-is
-            (r'\bnhi\b', 'nhi', 0),             # Keep as-is
-            (r'\baccha\b', 'aacha', re.IGNORECASE),
-            (r'\bachha\b', 'aacha', re.IGNORECASE),
-            (r'\bacha\b', 'aacha', re.IGNORECASE),
-            (r'\bpehle\b', 'phele', re.IGNORECASE),
-            (r'\bpahle\b', 'phele', re.IGNORECASE),
-            (r'\bkuch\b', 'kyuch', re.IGNORECASE),
-            (r'\btheek\b', 'thik', re.IGNORECASE),
-            (r'\bthik\b', 'thik', 0),           # Already correct
-            (r'\btoh\b', 'to', re.IGNORECASE),
-            (r'\bkaisi\b', 'kesi', re.IGNORECASE),
-            (r'\bkaro\b', 'kro', re.IGNORECASE),
-            (r'\bkarta\b', 'krta', re.IGNORECASE),
-            (r'\bkarti\b', 'krti', re.IGNORECASE),
-            (r'\bkarna\b', 'krna', re.IGNORECASE),
-            (r'\bkarne\b', 'krne', re.IGNORECASE),
-            (r'\bbatao\b', 'btao', re.IGNORECASE),
-            (r'\bhoga\b', 'hoga', 0),
-            (r'\bhogi\b', 'hogi', 0),
-            (r'\bmein\b', 'me', re.IGNORECASE),  # "mein" → "me"
-            (r'\bsahi\b', 'sahi', 0),
-            (r'\bOk\b', 'Ook', 0),               # "Ok" → "Ook"
-            (r'\bok\b', 'ook', 0),
-            (r'\bOkay\b', 'Ook', re.IGNORECASE),
-            # Casual abbreviations
-            (r'\bkya kar raha\b', 'kkrh', re.IGNORECASE),
-            (r'\bkya kar rahi\b', 'kkrh', re.IGNORECASE),
-            (r'\bkya kr raha\b', 'kkrh', re.IGNORECASE),
-            (r'\bkya kr rahi\b', 'kkrh', re.IGNORECASE),
-            (r'\btime pass\b', 'tp', re.IGNORECASE),
-            (r'\btimepass\b', 'tp', re.IGNORECASE),
-        ]
-
-        for pattern, replacement, flags in priority_replacements:
-            text = re.sub(pattern, replacement, text, flags=flags)
-
-        return text
+        return _SPELL_RE.sub(_spell_replacement, text)
 
     # ── Step 4: Capitalization ────────────────────────────────────────────
 
@@ -235,21 +287,14 @@ class PostProcessor:
         if not text or len(text) < 2:
             return text
 
-        # Preserve words that should stay capitalized
-        preserve = {
-            "Or", "Ha", "Hmm", "Ook", "Good", "BGMI", "Nahi",
-            "Hi", "Hello", "Hey", "Bye", "OK", "Tu", "Me",
-            "Ye", "Vo", "Ab", "Abhi", "Kya", "Aacha", "Sahi",
-            "To", "Phir", "Bol", "Bata", "De", "Kar", "Le",
-        }
-
         words = text.split()
         if not words:
             return text
 
-        # Capitalize first word
-        if words[0] not in preserve and not any(ord(c) > 0x1F000 for c in words[0]):
-            words[0] = words[0][:1].upper() + words[0][1:] if len(words[0]) > 1 else words[0].upper()
+        # Capitalize first word (unless it starts with an emoji)
+        first = words[0]
+        if first not in _PRESERVE_CAPS and ord(first[0]) <= 0x1F000:
+            words[0] = first[0].upper() + first[1:]
 
         return " ".join(words)
 
@@ -278,20 +323,20 @@ class PostProcessor:
         - No periods at end of casual messages
         """
         # Replace multiple exclamation marks
-        text = re.sub(r"!{2,}", "!", text)
+        text = _MULTI_BANG_RE.sub("!", text)
 
         # Replace multiple question marks
-        text = re.sub(r"\?{2,}", "?", text)
+        text = _MULTI_QUESTION_RE.sub("?", text)
 
         # Replace excessive dots (....) with just ..
-        text = re.sub(r"\.{3,}", "..", text)
+        text = _MULTI_DOT_RE.sub("..", text)
 
         # Remove trailing period on short casual messages
         if len(text) < 50 and text.endswith(".") and not text.endswith(".."):
             text = text[:-1]
 
         # Remove excessive commas
-        text = re.sub(r",{2,}", ",", text)
+        text = _MULTI_COMMA_RE.sub(",", text)
 
         return text.strip()
 
@@ -306,10 +351,8 @@ class PostProcessor:
 
         for i, msg in enumerate(messages):
             # Check for leaked standard spellings
-            leaked = []
-            for standard_word in ["hai", "aur", "haan", "accha", "pehle", "toh", "theek"]:
-                if re.search(rf'\b{standard_word}\b', msg, re.IGNORECASE):
-                    leaked.append(standard_word)
+            found = {w.lower() for w in _LEAKED_RE.findall(msg)}
+            leaked = [w for w in _LEAKED_WORDS if w in found]
             if leaked:
                 issues.append(f"Msg {i+1}: leaked standard spellings: {leaked}")
 
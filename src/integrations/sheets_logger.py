@@ -2,6 +2,8 @@
 Google Sheets Logger
 ====================
 Append-only chat log for visibility.
+Rows are buffered and appended in batches, so a burst of messages costs
+one Sheets API call instead of one per row.
 """
 
 import json
@@ -14,8 +16,10 @@ from src.config import (
     SHEETS_SPREADSHEET_ID,
     SHEETS_TAB_NAME,
     SHEETS_SERVICE_ACCOUNT_JSON,
-    ENABLE_SHEETS_LOG,
+    SHEETS_LOG_ENABLED,
+    SHEETS_FLUSH_INTERVAL,
 )
+from src.memory.write_buffer import WriteBehindBuffer
 
 
 class SheetsLogger:
@@ -23,10 +27,14 @@ class SheetsLogger:
 
     def __init__(self):
         self._service = None
+        # append_message() only enqueues; rows go out in one append per batch
+        self._rows = WriteBehindBuffer(
+            self._append_rows, name="sheets_log", interval=SHEETS_FLUSH_INTERVAL
+        )
 
     @property
     def enabled(self) -> bool:
-        return ENABLE_SHEETS_LOG and bool(SHEETS_SPREADSHEET_ID)
+        return SHEETS_LOG_ENABLED
 
     @property
     def service(self):
@@ -38,7 +46,8 @@ class SheetsLogger:
                 info,
                 scopes=["https://www.googleapis.com/auth/spreadsheets"],
             )
-            self._service = build("sheets", "v4", credentials=creds)
+            # cache_discovery=False: skip the on-disk discovery cache probe
+            self._service = build("sheets", "v4", credentials=creds, cache_discovery=False)
         return self._service
 
     def append_message(
@@ -54,14 +63,21 @@ class SheetsLogger:
             return
 
         ts = timestamp or datetime.utcnow().isoformat()
-        values = [[ts, conversation_id, partner_name, role, content, provider]]
-        body = {"values": values}
-        sheet_range = f"{SHEETS_TAB_NAME}!A1"
+        self._rows.add([ts, conversation_id, partner_name, role, content, provider])
 
+    def _append_rows(self, rows: list[list]):
+        """Append a batch of buffered rows in a single API call."""
         self.service.spreadsheets().values().append(
             spreadsheetId=SHEETS_SPREADSHEET_ID,
-            range=sheet_range,
+            range=f"{SHEETS_TAB_NAME}!A1",
             valueInputOption="RAW",
             insertDataOption="INSERT_ROWS",
-            body=body,
+            body={"values": rows},
         ).execute()
+
+    def flush(self):
+        """Append everything buffered right now."""
+        self._rows.flush()
+
+    def close(self):
+        self._rows.close()
@@ -4,8 +4,16 @@ Base LLM Client
 Abstract interface for LLM providers. All providers implement this.
 """
 
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
 
+import httpx
+
+# Keep-alive pool per client; requests are rate-limited, so a few suffice
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30)
+
 
 class BaseLLMClient(ABC):
     """Abstract LLM client interface."""
@@ -54,3 +62,74 @@ class BaseLLMClient(ABC):
     ) -> str:
         """Synchronous version of generate."""
         ...
+
+
+class PooledHTTPMixin:
+    """
+    Pooled httpx clients for providers called over plain HTTP, kept across
+    calls so keep-alive connections skip the TCP + TLS handshake.
+    Built on first use; release with aclose() on shutdown.
+    """
+
+    _async_http: httpx.AsyncClient | None = None
+    _async_http_loop: asyncio.AbstractEventLoop | None = None
+    _sync_http: httpx.Client | None = None
+
+    @property
+    def async_http(self) -> httpx.AsyncClient:
+        """Shared AsyncClient for the running event loop."""
+        # An AsyncClient's connections belong to the loop that opened them;
+        # the API server and the sync wrapper run separate loops.
+        loop = asyncio.get_running_loop()
+        if self._async_http is None or self._async_http_loop is not loop:
+            self._async_http = httpx.AsyncClient(timeout=30, limits=_HTTP_LIMITS)
+            self._async_http_loop = loop
+        return self._async_http
+
+    @property
+    def sync_http(self) -> httpx.Client:
+        if self._sync_http is None:
+            self._sync_http = httpx.Client(timeout=30, limits=_HTTP_LIMITS)
+        return self._sync_http
+
+    async def aclose(self):
+        """Close the pooled HTTP clients (call on shutdown)."""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+        if self._sync_http is not None:
+            self._sync_http.close()
+            self._sync_http = None
+
+
+class SpacedRateLimitMixin:
+    """
+    Keeps requests at least `min_interval` seconds apart. Each caller books
+    the next free slot under a lock and then waits for it, so concurrent
+    requests queue up in order instead of all firing when the window opens.
+    """
+
+    def _init_rate_limit(self, min_interval: float):
+        self._min_interval = min_interval
+        self._next_slot = 0.0
+        self._slot_lock = threading.Lock()
+
+    def _reserve_slot(self) -> float:
+        """Book the next slot; returns seconds to wait before sending."""
+        with self._slot_lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self._min_interval
+        return start - now
+
+    async def _rate_limit_wait_async(self):
+        """Non-blocking rate-limit wait (yields to the event loop)."""
+        wait = self._reserve_slot()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _rate_limit_wait_sync(self):
+        """Blocking rate-limit wait (for sync callers)."""
+        wait = self._reserve_slot()
+        if wait > 0:
+            time.sleep(wait)
@@ -9,6 +9,7 @@ If all fail, raises an exception.
 import asyncio
 import traceback
 
+from src.async_utils import run_sync
 from src.llm.base import BaseLLMClient
 from src.llm.groq_client import GroqClient
 from src.llm.google_client import GoogleClient
@@ -41,6 +42,13 @@ class LLMFallbackChain:
         """Name of the last successfully used provider."""
         return self._last_used
 
+    async def aclose(self):
+        """Release provider HTTP connections (call on shutdown)."""
+        for client in self._clients.values():
+            aclose = getattr(client, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
     def status(self) -> dict:
         """Get status of all providers."""
         return {
@@ -131,22 +139,12 @@ class LLMFallbackChain:
         max_tokens: int = None,
         preferred_provider: str = None,
     ) -> str:
-        """Synchronous wrapper around generate()."""
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if loop and loop.is_running():
-            # We're inside an async context; create a new thread
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                future = pool.submit(
-                    asyncio.run,
-                    self.generate(messages, temperature, max_tokens, preferred_provider),
-                )
-                return future.result()
-        else:
-            return asyncio.run(
-                self.generate(messages, temperature, max_tokens, preferred_provider)
-            )
+        """Synchronous wrapper around generate().
+
+        Runs on the shared background loop, so it works with or without
+        a running loop in the caller and reuses the providers' pooled
+        connections between calls.
+        """
+        return run_sync(
+            self.generate(messages, temperature, max_tokens, preferred_provider)
+        )
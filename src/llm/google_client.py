@@ -6,9 +6,9 @@ Free tier: 15 RPM, 1M tokens/day.
 Uses the google-generativeai SDK.
 """
 
-import time
+import asyncio
 
-from src.llm.base import BaseLLMClient
+from src.llm.base import BaseLLMClient, SpacedRateLimitMixin
 from src.config import (
     GOOGLE_API_KEY,
     GOOGLE_MODEL,
@@ -18,13 +18,12 @@ from src.config import (
 )
 
 
-class GoogleClient(BaseLLMClient):
+class GoogleClient(SpacedRateLimitMixin, BaseLLMClient):
     """Google AI Studio (Gemini) client."""
 
     def __init__(self):
         self._client = None
-        self._last_request_time = 0
-        self._min_interval = 4.5  # ~15 RPM → 1 req per 4s (safe margin)
+        self._init_rate_limit(4.5)  # ~15 RPM → 1 req per 4s (safe margin)
 
     @property
     def name(self) -> str:
@@ -41,13 +40,6 @@ class GoogleClient(BaseLLMClient):
             self._client = genai.Client(api_key=GOOGLE_API_KEY)
         return self._client
 
-    def _rate_limit_wait(self):
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.time()
-
     def _chatml_to_gemini(self, messages: list[dict]) -> tuple[str, list[dict]]:
         """
         Convert ChatML messages to Gemini's format.
@@ -86,7 +78,7 @@ class GoogleClient(BaseLLMClient):
         if not self.is_available:
             raise RuntimeError("Google API key not configured")
 
-        self._rate_limit_wait()
+        await self._rate_limit_wait_async()
         client = self._get_client()
         system_text, contents = self._chatml_to_gemini(messages)
 
@@ -99,7 +91,9 @@ class GoogleClient(BaseLLMClient):
             max_output_tokens=max_tokens or GOOGLE_MAX_TOKENS,
         )
 
-        response = client.models.generate_content(
+        # The SDK call blocks; run it off the event loop
+        response = await asyncio.to_thread(
+            client.models.generate_content,
             model=GOOGLE_MODEL,
             contents=contents,
             config=config,
@@ -6,11 +6,11 @@ Free tier: 30 requests/min, 6000 tokens/min.
 Uses OpenAI-compatible API format via httpx.
 """
 
-import httpx
 import asyncio
+import threading
 import time
 
-from src.llm.base import BaseLLMClient
+from src.llm.base import BaseLLMClient, PooledHTTPMixin
 
 # Use monotonic clock for rate limiting (immune to system clock changes)
 _clock = time.monotonic
@@ -27,7 +27,7 @@ from src.config import (
 )
 
 
-class GroqClient(BaseLLMClient):
+class GroqClient(PooledHTTPMixin, BaseLLMClient):
     """Groq API client (OpenAI-compatible) with automatic multi-key rotation.
     
     Supports unlimited API keys. Add keys in .env using any format:
@@ -35,16 +35,20 @@ class GroqClient(BaseLLMClient):
       GROQ_API_KEY_1=..., GROQ_API_KEY_2=... (numbered — unlimited)
       GROQ_API_KEY=...                    (single — backward-compatible)
     
-    On 429 (rate limit), automatically rotates to the next key.
+    Each key has its own rate-limit window (30 RPM per key), and every
+    request goes to the key whose window opens first — so N keys give
+    ~N× throughput. On 429 (rate limit), automatically rotates to the next key.
     """
 
     def __init__(self):
-        self._last_request_time = 0
-        self._min_interval = 2.1  # ~30 RPM → 1 req per 2s (safe margin)
+        self._min_interval = 2.1  # ~30 RPM per key → 1 req per 2s (safe margin)
         
         # Multi-key rotation support
         self.keys = list(GROQ_API_KEYS) if GROQ_API_KEYS else ([GROQ_API_KEY] if GROQ_API_KEY else [])
-        self.current_key_index = 0
+        self.current_key_index = 0   # key used by the most recent request
+        # Per key: earliest monotonic time its next request may be sent
+        self._next_slot = [0.0] * max(len(self.keys), 1)
+        self._slot_lock = threading.Lock()
         self._total_requests = 0
         self._total_rotations = 0
         self.key_stats = {i: {"ok": 0, "429": 0} for i in range(len(self.keys))}
@@ -60,25 +64,32 @@ class GroqClient(BaseLLMClient):
     def is_available(self) -> bool:
         return len(self.keys) > 0
 
-    def _get_headers(self) -> dict:
-        """Get headers with current API key for rotation."""
-        current_key = self.keys[self.current_key_index] if self.keys else ""
+    def _get_headers(self, key_index: int) -> dict:
+        """Get headers for the given API key."""
+        current_key = self.keys[key_index] if self.keys else ""
         return {
             "Authorization": f"Bearer {current_key}",
             "Content-Type": "application/json",
         }
     
-    def _rotate_key(self):
-        """Switch to next available API key. Returns True if wrapped around."""
+    def _rotate_key(self, key_index: int) -> tuple[int, float]:
+        """
+        Move a request that hit 429 on `key_index` to the next key.
+        Returns (new key index, seconds to wait before retrying) — the
+        retry books the new key's next free slot like any other request.
+        """
         if len(self.keys) <= 1:
-            return False
-        old_idx = self.current_key_index
-        self.current_key_index = (self.current_key_index + 1) % len(self.keys)
+            return key_index, 0.0
+        new_idx = (key_index + 1) % len(self.keys)
+        with self._slot_lock:
+            now = _clock()
+            start = max(now, self._next_slot[new_idx])
+            self._next_slot[new_idx] = start + self._min_interval
+        self.current_key_index = new_idx
         self._total_rotations += 1
-        wrapped = self.current_key_index <= old_idx  # True if cycled back to start
-        print(f"  [Groq] Rotated to key #{self.current_key_index + 1}/{len(self.keys)} "
-              f"(429s on this key: {self.key_stats[self.current_key_index]['429']})")
-        return wrapped
+        print(f"  [Groq] Rotated to key #{new_idx + 1}/{len(self.keys)} "
+              f"(429s on this key: {self.key_stats[new_idx]['429']})")
+        return new_idx, start - now
     
     def get_stats(self) -> dict:
         """Return key rotation statistics for monitoring."""
@@ -110,21 +121,34 @@ class GroqClient(BaseLLMClient):
             "stream": False,
         }
 
-    async def _rate_limit_wait_async(self):
-        """Non-blocking rate-limit wait (server-friendly)."""
-        now = _clock()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            await asyncio.sleep(self._min_interval - elapsed)
-        self._last_request_time = _clock()
-
-    def _rate_limit_wait_sync(self):
-        """Blocking rate-limit wait (for sync callers)."""
-        now = _clock()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = _clock()
+    def _reserve_key(self) -> tuple[int, float]:
+        """
+        Book the next slot on the key whose window opens first.
+        Returns (key index, seconds to wait before sending). Booking is
+        done up front under a lock, so concurrent requests never pick
+        the same slot.
+        """
+        with self._slot_lock:
+            idx = min(range(len(self._next_slot)), key=self._next_slot.__getitem__)
+            now = _clock()
+            start = max(now, self._next_slot[idx])
+            self._next_slot[idx] = start + self._min_interval
+        self.current_key_index = idx
+        return idx, start - now
+
+    async def _rate_limit_wait_async(self) -> int:
+        """Non-blocking rate-limit wait (server-friendly). Returns the key index."""
+        idx, wait = self._reserve_key()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return idx
+
+    def _rate_limit_wait_sync(self) -> int:
+        """Blocking rate-limit wait (for sync callers). Returns the key index."""
+        idx, wait = self._reserve_key()
+        if wait > 0:
+            time.sleep(wait)
+        return idx
 
     async def generate(
         self,
@@ -135,7 +159,7 @@ class GroqClient(BaseLLMClient):
         if not self.is_available:
             raise RuntimeError("Groq API keys not configured")
 
-        await self._rate_limit_wait_async()
+        key_idx = await self._rate_limit_wait_async()
         self._total_requests += 1
         payload = self._build_payload(
             messages,
@@ -146,23 +170,25 @@ class GroqClient(BaseLLMClient):
         # Try each key once; on 429 rotate to next key automatically
         max_attempts = max(len(self.keys), 1)
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            for attempt in range(max_attempts):
-                resp = await client.post(
-                    f"{GROQ_BASE_URL}/chat/completions",
-                    headers=self._get_headers(),
-                    json=payload,
-                )
-                
-                if resp.status_code == 429:
-                    self.key_stats[self.current_key_index]["429"] += 1
-                    if len(self.keys) > 1 and attempt < max_attempts - 1:
-                        self._rotate_key()
-                        continue
-                
-                resp.raise_for_status()
-                self.key_stats[self.current_key_index]["ok"] += 1
-                return resp.json()["choices"][0]["message"]["content"].strip()
+        client = self.async_http
+        for attempt in range(max_attempts):
+            resp = await client.post(
+                f"{GROQ_BASE_URL}/chat/completions",
+                headers=self._get_headers(key_idx),
+                json=payload,
+            )
+            
+            if resp.status_code == 429:
+                self.key_stats[key_idx]["429"] += 1
+                if len(self.keys) > 1 and attempt < max_attempts - 1:
+                    key_idx, wait = self._rotate_key(key_idx)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    continue
+            
+            resp.raise_for_status()
+            self.key_stats[key_idx]["ok"] += 1
+            return resp.json()["choices"][0]["message"]["content"].strip()
         
         # All keys exhausted — raise the last 429
         resp.raise_for_status()
@@ -177,7 +203,7 @@ class GroqClient(BaseLLMClient):
         if not self.is_available:
             raise RuntimeError("Groq API keys not configured")
 
-        self._rate_limit_wait_sync()
+        key_idx = self._rate_limit_wait_sync()
         self._total_requests += 1
         payload = self._build_payload(
             messages,
@@ -188,23 +214,25 @@ class GroqClient(BaseLLMClient):
         # Try each key once; on 429 rotate to next key automatically
         max_attempts = max(len(self.keys), 1)
         
-        with httpx.Client(timeout=30) as client:
-            for attempt in range(max_attempts):
-                resp = client.post(
-                    f"{GROQ_BASE_URL}/chat/completions",
-                    headers=self._get_headers(),
-                    json=payload,
-                )
-                
-                if resp.status_code == 429:
-                    self.key_stats[self.current_key_index]["429"] += 1
-                    if len(self.keys) > 1 and attempt < max_attempts - 1:
-                        self._rotate_key()
-                        continue
-                
-                resp.raise_for_status()
-                self.key_stats[self.current_key_index]["ok"] += 1
-                return resp.json()["choices"][0]["message"]["content"].strip()
+        client = self.sync_http
+        for attempt in range(max_attempts):
+            resp = client.post(
+                f"{GROQ_BASE_URL}/chat/completions",
+                headers=self._get_headers(key_idx),
+                json=payload,
+            )
+            
+            if resp.status_code == 429:
+                self.key_stats[key_idx]["429"] += 1
+                if len(self.keys) > 1 and attempt < max_attempts - 1:
+                    key_idx, wait = self._rotate_key(key_idx)
+                    if wait > 0:
+                        time.sleep(wait)
+                    continue
+            
+            resp.raise_for_status()
+            self.key_stats[key_idx]["ok"] += 1
+            return resp.json()["choices"][0]["message"]["content"].strip()
         
         resp.raise_for_status()
         return resp.json()["choices"][0]["message"]["content"].strip()
@@ -6,10 +6,7 @@ Free tier: $25 credit on signup, competitive pricing after.
 Uses OpenAI-compatible API format.
 """
 
-import httpx
-import time
-
-from src.llm.base import BaseLLMClient
+from src.llm.base import BaseLLMClient, PooledHTTPMixin, SpacedRateLimitMixin
 from src.config import (
     TOGETHER_API_KEY,
     TOGETHER_MODEL,
@@ -22,12 +19,11 @@ from src.config import (
 )
 
 
-class TogetherClient(BaseLLMClient):
+class TogetherClient(PooledHTTPMixin, SpacedRateLimitMixin, BaseLLMClient):
     """Together AI client (OpenAI-compatible)."""
 
     def __init__(self):
-        self._last_request_time = 0
-        self._min_interval = 1.1  # ~60 RPM
+        self._init_rate_limit(1.1)  # ~60 RPM
 
     @property
     def name(self) -> str:
@@ -60,13 +56,6 @@ class TogetherClient(BaseLLMClient):
             "stream": False,
         }
 
-    def _rate_limit_wait(self):
-        now = time.time()
-        elapsed = now - self._last_request_time
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
-        self._last_request_time = time.time()
-
     async def generate(
         self,
         messages: list[dict],
@@ -76,21 +65,20 @@ class TogetherClient(BaseLLMClient):
         if not self.is_available:
             raise RuntimeError("Together API key not configured")
 
-        self._rate_limit_wait()
+        await self._rate_limit_wait_async()
         payload = self._build_payload(
             messages,
             temperature or TEMPERATURE,
             max_tokens or TOGETHER_MAX_TOKENS,
         )
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            resp = await client.post(
-                f"{TOGETHER_BASE_URL}/chat/completions",
-                headers=self._get_headers(),
-                json=payload,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self.async_http.post(
+            f"{TOGETHER_BASE_URL}/chat/completions",
+            headers=self._get_headers(),
+            json=payload,
+        )
+        resp.raise_for_status()
+        data = resp.json()
 
         return data["choices"][0]["message"]["content"].strip()
 
@@ -103,20 +91,19 @@ class TogetherClient(BaseLLMClient):
         if not self.is_available:
             raise RuntimeError("Together API key not configured")
 
-        self._rate_limit_wait()
+        self._rate_limit_wait_sync()
         payload = self._build_payload(
             messages,
             temperature or TEMPERATURE,
             max_tokens or TOGETHER_MAX_TOKENS,
         )
 
-        with httpx.Client(timeout=30) as client:
-            resp = client.post(
-                f"{TOGETHER_BASE_URL}/chat/completions",
-                headers=self._get_headers(),
-                json=payload,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = self.sync_http.post(
+            f"{TOGETHER_BASE_URL}/chat/completions",
+            headers=self._get_headers(),
+            json=payload,
+        )
+        resp.raise_for_status()
+        data = resp.json()
 
         return data["choices"][0]["message"]["content"].strip()
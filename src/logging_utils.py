@@ -0,0 +1,47 @@
+"""
+Logging Helpers
+===============
+Loggers for the request path. A rate-limiting filter keeps a burst of
+identical failures (e.g. the history DB flapping) from turning every
+request into a traceback dump.
+"""
+
+import logging
+import time
+
+# Same message (per logger) is emitted at most this many times per window
+LOG_RATE_LIMIT = 5
+LOG_RATE_WINDOW = 1.0
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeats of a log message beyond `limit` per `window` seconds."""
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._seen: dict[tuple[str, str], list] = {}   # key → [window_start, count]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Keyed on the unformatted template, so "%s failed" with different
+        # args still counts as one message.
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is None or now - entry[0] >= self.window:
+            self._seen[key] = [now, 1]
+            return True
+        entry[1] += 1
+        return entry[1] <= self.limit
+
+
+_RATE_LIMIT = RateLimitFilter()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """logging.getLogger(name) with the shared rate limiter attached."""
+    logger = logging.getLogger(name)
+    if _RATE_LIMIT not in logger.filters:
+        logger.addFilter(_RATE_LIMIT)
+    return logger
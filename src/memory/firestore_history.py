@@ -4,7 +4,10 @@ Conversation History (Firestore)
 Cloud-backed conversation history for context continuity.
 """
 
+import functools
+import itertools
 import json
+import threading
 from datetime import datetime, timedelta
 
 from google.cloud import firestore
@@ -16,35 +19,73 @@ from src.config import (
     FIRESTORE_SERVICE_ACCOUNT_JSON,
     FIRESTORE_CONVERSATIONS_COLLECTION,
     FIRESTORE_MESSAGES_COLLECTION,
+    FIRESTORE_POOL_SIZE,
     HISTORY_WINDOW,
 )
+from src.memory.history import flatten_content
+from src.memory.recent_cache import RecentHistoryCache
+from src.memory.write_buffer import WriteBehindBuffer
 
 
-class FirestoreHistory:
+# Process-wide pool of clients, handed out round-robin so concurrent RPCs
+# spread across several gRPC channels instead of queueing on one.
+_POOL_LOCK = threading.Lock()
+_CLIENT_CYCLE = None
+
+
+def _create_client_pool(size: int) -> list[firestore.Client]:
+    credentials = None
+    if FIRESTORE_SERVICE_ACCOUNT_JSON:
+        info = json.loads(FIRESTORE_SERVICE_ACCOUNT_JSON)
+        credentials = service_account.Credentials.from_service_account_info(info)
+    kwargs = {"database": FIRESTORE_DATABASE, "credentials": credentials}
+    if FIRESTORE_PROJECT_ID:
+        kwargs["project"] = FIRESTORE_PROJECT_ID
+    return [firestore.Client(**kwargs) for _ in range(size)]
+
+
+def _next_client() -> firestore.Client:
+    global _CLIENT_CYCLE
+    if _CLIENT_CYCLE is None:
+        with _POOL_LOCK:
+            if _CLIENT_CYCLE is None:
+                _CLIENT_CYCLE = itertools.cycle(
+                    _create_client_pool(max(FIRESTORE_POOL_SIZE, 1))
+                )
+    return next(_CLIENT_CYCLE)
+
+
+def _count(query) -> int:
+    """Server-side COUNT aggregation: one round trip, no documents streamed."""
+    return int(query.count().get()[0][0].value)
+
+
+# Firestore caps a WriteBatch at 500 operations
+_MAX_BATCH_OPS = 500
+
+
+def _delete_in_batches(client: firestore.Client, refs):
+    """Delete documents with one batch commit per 500 refs."""
+    refs = iter(refs)
+    while chunk := list(itertools.islice(refs, _MAX_BATCH_OPS)):
+        batch = client.batch()
+        for ref in chunk:
+            batch.delete(ref)
+        batch.commit()
+
+
+class FirestoreHistory(RecentHistoryCache):
     """Firestore-backed conversation history for session continuity."""
 
     def __init__(self):
-        self._client = None
+        # add_message() only enqueues; batches are committed in the background
+        self._writes = WriteBehindBuffer(self._commit_messages, name="firestore_history")
+        self._init_recent_cache()
 
     @property
     def client(self) -> firestore.Client:
-        if self._client is None:
-            credentials = None
-            if FIRESTORE_SERVICE_ACCOUNT_JSON:
-                info = json.loads(FIRESTORE_SERVICE_ACCOUNT_JSON)
-                credentials = service_account.Credentials.from_service_account_info(info)
-            if FIRESTORE_PROJECT_ID:
-                self._client = firestore.Client(
-                    project=FIRESTORE_PROJECT_ID,
-                    database=FIRESTORE_DATABASE,
-                    credentials=credentials,
-                )
-            else:
-                self._client = firestore.Client(
-                    database=FIRESTORE_DATABASE,
-                    credentials=credentials,
-                )
-        return self._client
+        """Next client from the shared pool (grab once per operation)."""
+        return _next_client()
 
     # ── Conversation Management ───────────────────────────────────────────
 
@@ -79,7 +120,7 @@ class FirestoreHistory:
         self,
         conversation_id: str,
         role: str,
-        content: str,
+        content: str | list[str],
         timestamp: str = None,
         metadata: dict = None,
     ):
@@ -93,17 +134,51 @@ class FirestoreHistory:
             "timestamp": ts,
             "metadata": meta,
         }
-        self.client.collection(FIRESTORE_MESSAGES_COLLECTION).add(msg)
-        self.client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).document(conversation_id).set(
+        self._record_recent(
+            conversation_id,
             {
-                "last_active": ts,
-                "message_count": firestore.Increment(1),
+                "role": role,
+                "content": content,
+                "timestamp": ts.isoformat(),
+                "metadata": meta,
             },
-            merge=True,
+            write=functools.partial(self._writes.add, msg),
         )
 
+    def _commit_messages(self, msgs: list[dict]):
+        """Write buffered messages + conversation updates in one WriteBatch."""
+        client = self.client
+        messages = client.collection(FIRESTORE_MESSAGES_COLLECTION)
+        conversations = client.collection(FIRESTORE_CONVERSATIONS_COLLECTION)
+        batch = client.batch()
+        # One conversation update per conversation, not per message:
+        # conversation_id → [latest timestamp, message count]
+        touched: dict[str, list] = {}
+        for msg in msgs:
+            batch.set(messages.document(), msg)
+            conv = touched.get(msg["conversation_id"])
+            if conv is None:
+                touched[msg["conversation_id"]] = [msg["timestamp"], 1]
+            else:
+                conv[0] = max(conv[0], msg["timestamp"])
+                conv[1] += 1
+        for conversation_id, (last_active, count) in touched.items():
+            batch.set(
+                conversations.document(conversation_id),
+                {
+                    "last_active": last_active,
+                    "message_count": firestore.Increment(count),
+                },
+                merge=True,
+            )
+        batch.commit()
+
     def get_recent_messages(self, conversation_id: str, limit: int = None) -> list[dict]:
         n = limit or HISTORY_WINDOW
+        cached, token = self._cached_recent(conversation_id, n)
+        if cached is not None:
+            return cached
+        self._writes.flush()
         docs = (
             self.client.collection(FIRESTORE_MESSAGES_COLLECTION)
             .where("conversation_id", "==", conversation_id)
@@ -126,15 +201,17 @@ class FirestoreHistory:
                     "metadata": data.get("metadata") or {},
                 }
             )
+        self._remember_recent(conversation_id, token, messages, n)
         return messages
 
     def get_recent_as_chatml(self, conversation_id: str, limit: int = None) -> list[dict]:
         messages = self.get_recent_messages(conversation_id, limit)
-        return [{"role": m["role"], "content": m["content"]} for m in messages]
+        return [{"role": m["role"], "content": flatten_content(m["content"])} for m in messages]
 
     # ── Session Detection ─────────────────────────────────────────────────
 
     def is_new_session(self, conversation_id: str, gap_hours: float = 2.0) -> bool:
+        self._writes.flush()
         docs = (
             self.client.collection(FIRESTORE_MESSAGES_COLLECTION)
             .where("conversation_id", "==", conversation_id)
@@ -154,40 +231,41 @@ class FirestoreHistory:
     # ── Stats ─────────────────────────────────────────────────────────────
 
     def get_stats(self, conversation_id: str = None) -> dict:
+        self._writes.flush()
+        client = self.client
         if conversation_id:
-            docs = (
-                self.client.collection(FIRESTORE_MESSAGES_COLLECTION)
-                .where("conversation_id", "==", conversation_id)
-                .stream()
-            )
-            count = sum(1 for _ in docs)
+            # The conversation doc keeps a running count; no message reads
+            doc = client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).document(conversation_id).get()
+            count = (doc.to_dict() or {}).get("message_count", 0)
             return {"conversation_id": conversation_id, "message_count": count}
 
-        conv_docs = self.client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).stream()
-        msg_docs = self.client.collection(FIRESTORE_MESSAGES_COLLECTION).stream()
         return {
-            "total_conversations": sum(1 for _ in conv_docs),
-            "total_messages": sum(1 for _ in msg_docs),
+            "total_conversations": _count(client.collection(FIRESTORE_CONVERSATIONS_COLLECTION)),
+            "total_messages": _count(client.collection(FIRESTORE_MESSAGES_COLLECTION)),
         }
 
     # ── Cleanup ───────────────────────────────────────────────────────────
 
     def clear_conversation(self, conversation_id: str):
-        conv_ref = self.client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).document(conversation_id)
-        conv_ref.delete()
+        self._writes.flush()
+        client = self.client
         docs = (
-            self.client.collection(FIRESTORE_MESSAGES_COLLECTION)
+            client.collection(FIRESTORE_MESSAGES_COLLECTION)
             .where("conversation_id", "==", conversation_id)
             .stream()
         )
-        for doc in docs:
-            doc.reference.delete()
+        conv_ref = client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).document(conversation_id)
+        _delete_in_batches(client, itertools.chain([conv_ref], (d.reference for d in docs)))
+        self._forget_recent(conversation_id)
 
     def clear_all(self):
-        for doc in self.client.collection(FIRESTORE_MESSAGES_COLLECTION).stream():
-            doc.reference.delete()
-        for doc in self.client.collection(FIRESTORE_CONVERSATIONS_COLLECTION).stream():
-            doc.reference.delete()
+        self._writes.flush()
+        client = self.client
+        for name in (FIRESTORE_MESSAGES_COLLECTION, FIRESTORE_CONVERSATIONS_COLLECTION):
+            docs = client.collection(name).stream()
+            _delete_in_batches(client, (d.reference for d in docs))
+        self._forget_recent()
 
     def close(self):
-        self._client = None
+        # Pooled clients are process-wide; only drain our pending writes
+        self._writes.close()
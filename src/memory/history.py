@@ -7,18 +7,33 @@ Tracks messages, timestamps, and session metadata.
 
 import json
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from src.config import HISTORY_DB, HISTORY_WINDOW
+from src.memory.recent_cache import RecentHistoryCache
 
+MSG_BREAK_SEP = " [MSG_BREAK] "
 
-class ConversationHistory:
+
+def flatten_content(content: str | list[str]) -> str:
+    """Burst replies are stored as lists; prompts/display get them joined."""
+    if isinstance(content, list):
+        return MSG_BREAK_SEP.join(content)
+    return content
+
+
+class ConversationHistory(RecentHistoryCache):
     """SQLite-backed conversation history for session continuity."""
 
     def __init__(self, db_path: Path = None):
         self.db_path = str(db_path or HISTORY_DB)
         self._conn = None
+        # The connection is shared with worker threads (Chatbot writes via
+        # asyncio.to_thread), so every statement+commit runs under this lock.
+        self._lock = threading.RLock()
+        self._init_recent_cache()
         self._init_db()
 
     # ── Database Setup ────────────────────────────────────────────────────
@@ -26,9 +41,18 @@ class ConversationHistory:
     @property
     def conn(self) -> sqlite3.Connection:
         if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self._conn.row_factory = sqlite3.Row
             self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL only fsyncs at checkpoints, not on every commit;
+            # a crash can lose the last few messages but never corrupts.
+            self._conn.executescript("""
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA mmap_size=268435456;
+                PRAGMA cache_size=-20000;
+                PRAGMA wal_autocheckpoint=1000;
+            """)
         return self._conn
 
     def _init_db(self):
@@ -52,8 +76,11 @@ class ConversationHistory:
                 metadata TEXT DEFAULT '{}'
             );
 
-            CREATE INDEX IF NOT EXISTS idx_messages_conv
-                ON messages(conversation_id, timestamp);
+            -- id is monotonic, so it orders a conversation without
+            -- comparing ISO timestamp strings
+            DROP INDEX IF EXISTS idx_messages_conv;
+            CREATE INDEX IF NOT EXISTS idx_messages_conv_id
+                ON messages(conversation_id, id);
             CREATE INDEX IF NOT EXISTS idx_conversations_active
                 ON conversations(last_active DESC);
         """)
@@ -67,36 +94,38 @@ class ConversationHistory:
         partner_name: str = "Unknown",
     ) -> dict:
         """Get or create a conversation record."""
-        row = self.conn.execute(
-            "SELECT * FROM conversations WHERE conversation_id = ?",
-            (conversation_id,),
-        ).fetchone()
-
-        if row:
-            return dict(row)
-
-        now = datetime.now().isoformat()
-        self.conn.execute(
-            """INSERT INTO conversations
-               (conversation_id, partner_name, created_at, last_active, message_count)
-               VALUES (?, ?, ?, ?, 0)""",
-            (conversation_id, partner_name, now, now),
-        )
-        self.conn.commit()
-        return {
-            "conversation_id": conversation_id,
-            "partner_name": partner_name,
-            "created_at": now,
-            "last_active": now,
-            "message_count": 0,
-        }
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM conversations WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+
+            if row:
+                return dict(row)
+
+            now = datetime.now().isoformat()
+            self.conn.execute(
+                """INSERT INTO conversations
+                   (conversation_id, partner_name, created_at, last_active, message_count)
+                   VALUES (?, ?, ?, ?, 0)""",
+                (conversation_id, partner_name, now, now),
+            )
+            self.conn.commit()
+            return {
+                "conversation_id": conversation_id,
+                "partner_name": partner_name,
+                "created_at": now,
+                "last_active": now,
+                "message_count": 0,
+            }
 
     def list_conversations(self) -> list[dict]:
         """List all conversations, most recent first."""
-        rows = self.conn.execute(
-            "SELECT * FROM conversations ORDER BY last_active DESC"
-        ).fetchall()
-        return [dict(r) for r in rows]
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM conversations ORDER BY last_active DESC"
+            ).fetchall()
+            return [dict(r) for r in rows]
 
     # ── Message Storage ───────────────────────────────────────────────────
 
@@ -104,27 +133,35 @@ class ConversationHistory:
         self,
         conversation_id: str,
         role: str,
-        content: str,
+        content: str | list[str],
         timestamp: str = None,
         metadata: dict = None,
     ):
         """Add a message to conversation history."""
         ts = timestamp or datetime.now().isoformat()
         meta_str = json.dumps(metadata or {}, ensure_ascii=False)
+        content = flatten_content(content)   # TEXT column: no native arrays
 
-        self.conn.execute(
-            """INSERT INTO messages
-               (conversation_id, role, content, timestamp, metadata)
-               VALUES (?, ?, ?, ?, ?)""",
-            (conversation_id, role, content, ts, meta_str),
-        )
-        self.conn.execute(
-            """UPDATE conversations
-               SET last_active = ?, message_count = message_count + 1
-               WHERE conversation_id = ?""",
-            (ts, conversation_id),
-        )
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO messages
+                   (conversation_id, role, content, timestamp, metadata)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (conversation_id, role, content, ts, meta_str),
+            )
+            self.conn.execute(
+                """UPDATE conversations
+                   SET last_active = ?, message_count = message_count + 1
+                   WHERE conversation_id = ?""",
+                (ts, conversation_id),
+            )
+            self.conn.commit()
+            self._record_recent(conversation_id, {
+                "role": role,
+                "content": content,
+                "timestamp": ts,
+                "metadata": metadata or {},
+            })
 
     def get_recent_messages(
         self,
@@ -136,14 +173,18 @@ class ConversationHistory:
         Returns in chronological order (oldest first).
         """
         n = limit or HISTORY_WINDOW
-        rows = self.conn.execute(
-            """SELECT role, content, timestamp, metadata
-               FROM messages
-               WHERE conversation_id = ?
-               ORDER BY timestamp DESC, id DESC
-               LIMIT ?""",
-            (conversation_id, n),
-        ).fetchall()
+        cached, token = self._cached_recent(conversation_id, n)
+        if cached is not None:
+            return cached
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT role, content, timestamp, metadata
+                   FROM messages
+                   WHERE conversation_id = ?
+                   ORDER BY id DESC
+                   LIMIT ?""",
+                (conversation_id, n),
+            ).fetchall()
 
         messages = []
         for row in reversed(rows):  # Reverse to get chronological order
@@ -158,6 +199,7 @@ class ConversationHistory:
                 "timestamp": row["timestamp"],
                 "metadata": meta,
             })
+        self._remember_recent(conversation_id, token, messages, n)
         return messages
 
     def get_recent_as_chatml(
@@ -177,13 +219,14 @@ class ConversationHistory:
         gap_hours: float = 2.0,
     ) -> bool:
         """Check if enough time has passed to consider this a new session."""
-        row = self.conn.execute(
-            """SELECT timestamp FROM messages
-               WHERE conversation_id = ?
-               ORDER BY timestamp DESC, id DESC
-               LIMIT 1""",
-            (conversation_id,),
-        ).fetchone()
+        with self._lock:
+            row = self.conn.execute(
+                """SELECT timestamp FROM messages
+                   WHERE conversation_id = ?
+                   ORDER BY id DESC
+                   LIMIT 1""",
+                (conversation_id,),
+            ).fetchone()
 
         if not row:
             return True
@@ -196,44 +239,50 @@ class ConversationHistory:
 
     def get_stats(self, conversation_id: str = None) -> dict:
         """Get message count stats."""
-        if conversation_id:
-            row = self.conn.execute(
-                "SELECT COUNT(*) as cnt FROM messages WHERE conversation_id = ?",
-                (conversation_id,),
+        with self._lock:
+            if conversation_id:
+                row = self.conn.execute(
+                    "SELECT COUNT(*) as cnt FROM messages WHERE conversation_id = ?",
+                    (conversation_id,),
+                ).fetchone()
+                return {"conversation_id": conversation_id, "message_count": row["cnt"]}
+
+            row = self.conn.execute("SELECT COUNT(*) as cnt FROM messages").fetchone()
+            conv_row = self.conn.execute(
+                "SELECT COUNT(*) as cnt FROM conversations"
             ).fetchone()
-            return {"conversation_id": conversation_id, "message_count": row["cnt"]}
-        
-        row = self.conn.execute("SELECT COUNT(*) as cnt FROM messages").fetchone()
-        conv_row = self.conn.execute(
-            "SELECT COUNT(*) as cnt FROM conversations"
-        ).fetchone()
-        return {
-            "total_messages": row["cnt"],
-            "total_conversations": conv_row["cnt"],
-        }
+            return {
+                "total_messages": row["cnt"],
+                "total_conversations": conv_row["cnt"],
+            }
 
     # ── Cleanup ───────────────────────────────────────────────────────────
 
     def clear_conversation(self, conversation_id: str):
         """Delete all messages and the conversation record."""
-        self.conn.execute(
-            "DELETE FROM messages WHERE conversation_id = ?",
-            (conversation_id,),
-        )
-        self.conn.execute(
-            "DELETE FROM conversations WHERE conversation_id = ?",
-            (conversation_id,),
-        )
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM messages WHERE conversation_id = ?",
+                (conversation_id,),
+            )
+            self.conn.execute(
+                "DELETE FROM conversations WHERE conversation_id = ?",
+                (conversation_id,),
+            )
+            self.conn.commit()
+        self._forget_recent(conversation_id)
 
     def clear_all(self):
         """Delete everything."""
-        self.conn.execute("DELETE FROM messages")
-        self.conn.execute("DELETE FROM conversations")
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("DELETE FROM messages")
+            self.conn.execute("DELETE FROM conversations")
+            self.conn.commit()
+        self._forget_recent()
 
     def close(self):
         """Close database connection."""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
@@ -8,14 +8,61 @@ Implements the same duck-typed interface as ConversationHistory (SQLite)
 and FirestoreHistory so Chatbot works with any backend via DI.
 """
 
+import functools
+import threading
 from datetime import datetime, timedelta
 
-from pymongo import MongoClient, DESCENDING
+from pymongo import MongoClient, DESCENDING, UpdateOne
 
-from src.config import MONGODB_URI, MONGODB_DATABASE, HISTORY_WINDOW
+from src.config import (
+    MONGODB_URI,
+    MONGODB_DATABASE,
+    MONGODB_MAX_POOL_SIZE,
+    MONGODB_COMPRESSORS,
+    HISTORY_WINDOW,
+)
+from src.logging_utils import get_logger
+from src.memory.history import flatten_content
+from src.memory.recent_cache import RecentHistoryCache
+from src.memory.write_buffer import WriteBehindBuffer
 
+logger = get_logger(__name__)
 
-class MongoHistory:
+
+# Process-wide clients (one pool per URI), shared by every MongoHistory.
+# Instances never close them; the app calls close_shared_clients() once
+# at shutdown.
+_CLIENTS_LOCK = threading.Lock()
+_CLIENTS: dict[str, MongoClient] = {}
+
+
+def _shared_client(uri: str) -> MongoClient:
+    """Pooled client for `uri`; connects lazily on the first operation."""
+    client = _CLIENTS.get(uri)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(uri)
+            if client is None:
+                client = MongoClient(
+                    uri,
+                    serverSelectionTimeoutMS=5000,
+                    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                    compressors=MONGODB_COMPRESSORS,
+                )
+                _CLIENTS[uri] = client
+    return client
+
+
+def close_shared_clients():
+    """Close every pooled client (call once, at process shutdown)."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+class MongoHistory(RecentHistoryCache):
     """MongoDB-backed conversation history with lazy connection."""
 
     def __init__(self, uri: str = None, database: str = None):
@@ -23,23 +70,16 @@ class MongoHistory:
         self._db_name = database or MONGODB_DATABASE
         self._client: MongoClient | None = None
         self._db = None
+        # add_message() only enqueues; batches are committed in the background
+        self._writes = WriteBehindBuffer(self._commit_messages, name="mongo_history")
+        self._init_recent_cache()
 
     # ── Lazy Connection ───────────────────────────────────────────────
 
     @property
     def client(self) -> MongoClient:
         if self._client is None:
-            try:
-                self._client = MongoClient(self._uri, serverSelectionTimeoutMS=5000)
-                # attempt to connect and surface any connection errors early
-                try:
-                    info = self._client.server_info()
-                    print(f"[mongo_history] connected to MongoDB server version={info.get('version')}")
-                except Exception as conn_err:
-                    print(f"[mongo_history] warning: could not retrieve server_info: {conn_err}")
-            except Exception as e:
-                print(f"[mongo_history] ERROR creating MongoClient: {e}")
-                raise
+            self._client = _shared_client(self._uri)
         return self._client
 
     @property
@@ -92,7 +132,7 @@ class MongoHistory:
         self,
         conversation_id: str,
         role: str,
-        content: str,
+        content: str | list[str],
         timestamp: str = None,
         metadata: dict = None,
     ):
@@ -104,32 +144,58 @@ class MongoHistory:
             "timestamp": ts,
             "metadata": metadata or {},
         }
+        self._record_recent(
+            conversation_id,
+            {
+                "role": role,
+                "content": content,
+                "timestamp": ts,
+                "metadata": msg["metadata"],
+            },
+            write=functools.partial(self._writes.add, msg),
+        )
+
+    def _commit_messages(self, msgs: list[dict]):
+        """Insert buffered messages, then bump each conversation once."""
         try:
-            res = self.db["messages"].insert_one(msg)
-            print(f"[mongo_history] insert_one ok id={res.inserted_id}")
+            res = self.db["messages"].insert_many(msgs, ordered=True)
+            logger.debug("[mongo_history] insert_many ok count=%d", len(res.inserted_ids))
         except Exception as e:
-            print(f"[mongo_history] ERROR inserting message for {conversation_id}: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("[mongo_history] ERROR inserting %d message(s): %s", len(msgs), e)
             # do not re-raise so the bot can still reply; caller can inspect logs
             return
 
+        # One update per conversation: latest timestamp + number of new messages
+        per_conv: dict[str, list] = {}
+        for msg in msgs:
+            entry = per_conv.setdefault(msg["conversation_id"], [msg["timestamp"], 0])
+            entry[0] = msg["timestamp"]
+            entry[1] += 1
         try:
-            self.db["conversations"].update_one(
-                {"conversation_id": conversation_id},
-                {"$set": {"last_active": ts}, "$inc": {"message_count": 1}},
+            self.db["conversations"].bulk_write(
+                [
+                    UpdateOne(
+                        {"conversation_id": conv_id},
+                        {"$set": {"last_active": ts}, "$inc": {"message_count": n}},
+                    )
+                    for conv_id, (ts, n) in per_conv.items()
+                ],
+                ordered=False,
             )
         except Exception as e:
-            print(f"[mongo_history] ERROR updating conversation metadata for {conversation_id}: {e}")
-            import traceback
-
-            traceback.print_exc()
+            logger.exception(
+                "[mongo_history] ERROR updating conversation metadata for %s: %s",
+                list(per_conv), e,
+            )
 
     def get_recent_messages(
         self, conversation_id: str, limit: int = None
     ) -> list[dict]:
         n = limit or HISTORY_WINDOW
+        cached, token = self._cached_recent(conversation_id, n)
+        if cached is not None:
+            return cached
+        self._writes.flush()
         cursor = (
             self.db["messages"]
             .find({"conversation_id": conversation_id})
@@ -148,19 +214,21 @@ class MongoHistory:
                     "metadata": row.get("metadata", {}),
                 }
             )
+        self._remember_recent(conversation_id, token, messages, n)
         return messages
 
     def get_recent_as_chatml(
         self, conversation_id: str, limit: int = None
     ) -> list[dict]:
         messages = self.get_recent_messages(conversation_id, limit)
-        return [{"role": m["role"], "content": m["content"]} for m in messages]
+        return [{"role": m["role"], "content": flatten_content(m["content"])} for m in messages]
 
     # ── Session Detection ─────────────────────────────────────────────
 
     def is_new_session(
         self, conversation_id: str, gap_hours: float = 2.0
     ) -> bool:
+        self._writes.flush()
         last = self.db["messages"].find_one(
             {"conversation_id": conversation_id},
             sort=[("timestamp", DESCENDING)],
@@ -176,30 +244,34 @@ class MongoHistory:
     # ── Stats ─────────────────────────────────────────────────────────
 
     def get_stats(self, conversation_id: str = None) -> dict:
+        self._writes.flush()
         if conversation_id:
             count = self.db["messages"].count_documents(
                 {"conversation_id": conversation_id}
             )
             return {"conversation_id": conversation_id, "message_count": count}
+        # Unfiltered totals come from collection metadata, not a scan
         return {
-            "total_messages": self.db["messages"].count_documents({}),
-            "total_conversations": self.db["conversations"].count_documents({}),
+            "total_messages": self.db["messages"].estimated_document_count(),
+            "total_conversations": self.db["conversations"].estimated_document_count(),
         }
 
     # ── Cleanup ───────────────────────────────────────────────────────
 
     def clear_conversation(self, conversation_id: str):
+        self._writes.flush()
         self.db["messages"].delete_many({"conversation_id": conversation_id})
         self.db["conversations"].delete_one(
             {"conversation_id": conversation_id}
         )
+        self._forget_recent(conversation_id)
 
     def clear_all(self):
+        self._writes.flush()
         self.db["messages"].delete_many({})
         self.db["conversations"].delete_many({})
+        self._forget_recent()
 
     def close(self):
-        if self._client:
-            self._client.close()
-            self._client = None
-            self._db = None
+        # The client is process-wide; only drain our pending writes
+        self._writes.close()
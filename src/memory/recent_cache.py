@@ -0,0 +1,103 @@
+"""
+Recent History Cache
+====================
+Keeps the last HISTORY_WINDOW messages of recently active conversations in
+memory, so the per-turn history read is a dict lookup instead of a query.
+The bot writes every message itself, so the cache is kept current by
+appending in add_message() rather than by expiring entries.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from typing import Callable
+
+from src.config import HISTORY_CACHE_SIZE, HISTORY_WINDOW
+
+
+class _Entry:
+    __slots__ = ("tail", "complete", "stale")
+
+    def __init__(self):
+        self.tail: deque | None = None   # None until the first read fills it
+        self.complete = False            # tail holds the whole conversation
+        self.stale = False               # written to while the read was in flight
+
+
+class RecentHistoryCache:
+    """Mixin for history backends: LRU of conversation_id → recent messages."""
+
+    def _init_recent_cache(self, size: int = None):
+        self._recent_size = HISTORY_CACHE_SIZE if size is None else size
+        self._recent: OrderedDict[str, _Entry] = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+    def _cached_recent(
+        self, conversation_id: str, n: int
+    ) -> tuple[list[dict] | None, _Entry | None]:
+        """
+        Last `n` messages (oldest first) and None on a hit. On a miss,
+        (None, token): read the backend, then pass the token to
+        _remember_recent().
+        """
+        if self._recent_size <= 0:
+            return None, None
+        with self._recent_lock:
+            entry = self._recent.get(conversation_id)
+            if entry is not None and entry.tail is not None:
+                if len(entry.tail) >= n or entry.complete:
+                    self._recent.move_to_end(conversation_id)
+                    return list(entry.tail)[-n:], None
+            # Miss: park an empty entry so writes racing the read are noticed.
+            # Readers share a parked entry until a write marks it stale.
+            if entry is None or entry.tail is not None or entry.stale:
+                entry = _Entry()
+                self._recent[conversation_id] = entry
+            self._recent.move_to_end(conversation_id)
+            while len(self._recent) > self._recent_size:
+                self._recent.popitem(last=False)
+        return None, entry
+
+    def _remember_recent(
+        self, conversation_id: str, token: _Entry | None, messages: list[dict], n: int
+    ):
+        """Fill the entry parked by _cached_recent() with a backend read."""
+        if token is None:
+            return
+        with self._recent_lock:
+            # Only the entry this read was parked on, and only if no write
+            # (and no newer reader) has replaced it since
+            if self._recent.get(conversation_id) is not token:
+                return
+            if token.tail is not None or token.stale:
+                return
+            token.tail = deque(messages, maxlen=HISTORY_WINDOW)
+            token.complete = len(messages) < n and len(messages) <= HISTORY_WINDOW
+
+    def _record_recent(
+        self, conversation_id: str, message: dict, write: Callable[[], None] = None
+    ):
+        """
+        Append a newly written message to the cached tail, if any.
+        `write` (the backend enqueue) runs under the same lock, so a
+        concurrent miss sees the message either in its read or in the
+        tail, never in both.
+        """
+        with self._recent_lock:
+            if write is not None:
+                write()
+            entry = self._recent.get(conversation_id)
+            if entry is None:
+                return
+            if entry.tail is None:
+                entry.stale = True
+                return
+            if len(entry.tail) == entry.tail.maxlen:
+                entry.complete = False
+            entry.tail.append(message)
+
+    def _forget_recent(self, conversation_id: str = None):
+        with self._recent_lock:
+            if conversation_id is None:
+                self._recent.clear()
+            else:
+                self._recent.pop(conversation_id, None)
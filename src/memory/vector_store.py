@@ -8,19 +8,23 @@ given a girl's message, for few-shot prompting.
 Uses sentence-transformers all-MiniLM-L6-v2 (~80MB, CPU-only).
 """
 
-import json
+import functools
 import hashlib
 from pathlib import Path
 
 import chromadb
+import orjson
 from chromadb.config import Settings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 
 from src.config import (
     CHROMA_DIR,
     CHROMA_COLLECTION,
+    EMBEDDING_CACHE_SIZE,
     EXAMPLES_FILE,
     RETRIEVAL_TOP_K,
 )
+from src.engine.context_builder import display_text
 
 
 class VectorStore:
@@ -35,6 +39,14 @@ class VectorStore:
             settings=Settings(anonymized_telemetry=False),
         )
         self._collection = None
+        # Document count, cached once non-zero: the index only changes via
+        # index_example_bank()/reset(), which drop it
+        self._count: int | None = None
+
+        # Same model Chroma uses by default, held here so queries can be
+        # embedded (and cached) before they reach the collection.
+        self._embedding_fn = DefaultEmbeddingFunction()
+        self._embed = functools.lru_cache(maxsize=EMBEDDING_CACHE_SIZE)(self._embed_uncached)
 
     # ── Collection Management ─────────────────────────────────────────────
 
@@ -45,6 +57,7 @@ class VectorStore:
             self._collection = self.client.get_or_create_collection(
                 name=self.collection_name,
                 metadata={"hnsw:space": "cosine"},
+                embedding_function=self._embedding_fn,
             )
         return self._collection
 
@@ -55,6 +68,7 @@ class VectorStore:
         except Exception:
             pass
         self._collection = None
+        self._count = None
 
     # ── Indexing ──────────────────────────────────────────────────────────
 
@@ -72,64 +86,74 @@ class VectorStore:
         # Reset collection for fresh indexing
         self.reset()
 
-        examples = []
-        with open(src, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    examples.append(json.loads(line))
-
-        print(f"  Indexing {len(examples):,} examples into ChromaDB...")
+        print(f"  Indexing {src.name} into ChromaDB...")
 
-        # Process in batches (ChromaDB has batch limits)
+        # Stream the file and insert batch by batch (ChromaDB has batch
+        # limits), so only one batch of examples is held in memory
         documents = []
         metadatas = []
         ids = []
+        total = 0
+        i = -1   # example number (blank lines don't count), part of the doc id
 
-        for i, ex in enumerate(examples):
-            # The document is the girl's message — this is what we search against
-            context = ex["context"]
-            if not context.strip():
-                continue
-
-            # Unique ID based on content hash
-            content_hash = hashlib.md5(
-                f"{ex['timestamp']}:{context}:{ex['response']}".encode()
-            ).hexdigest()
-            doc_id = f"ex_{content_hash[:12]}_{i}"
-
-            # Truncate long preceding_context for metadata storage
-            preceding = ex.get("preceding_context", [])
-            preceding_str = json.dumps(preceding[-5:], ensure_ascii=False)
-            if len(preceding_str) > 2000:
-                preceding_str = preceding_str[:2000]
-
-            documents.append(context)
-            metadatas.append({
-                "response": ex["response"],
-                "categories": ",".join(ex["categories"]),
-                "chat_id": ex["chat_id"],
-                "timestamp": ex["timestamp"],
-                "context_length": ex.get("context_length", 1),
-                "preceding_context": preceding_str,
-            })
-            ids.append(doc_id)
-
-        # Batch insert
-        total = len(documents)
-        for start in range(0, total, batch_size):
-            end = min(start + batch_size, total)
-            self.collection.add(
-                documents=documents[start:end],
-                metadatas=metadatas[start:end],
-                ids=ids[start:end],
-            )
+        with open(src, "rb") as f:
+            for line in f:
+                # orjson takes the raw bytes, trailing newline included
+                if not line.strip():
+                    continue
+                ex = orjson.loads(line)
+                i += 1
+
+                # The document is the girl's message — this is what we search against
+                context = ex["context"]
+                if not context.strip():
+                    continue
+
+                # Unique ID based on content hash
+                content_hash = hashlib.md5(
+                    f"{ex['timestamp']}:{context}:{ex['response']}".encode()
+                ).hexdigest()
+                doc_id = f"ex_{content_hash[:12]}_{i}"
+
+                # Truncate long preceding_context for metadata storage
+                preceding = ex.get("preceding_context", [])
+                preceding_str = orjson.dumps(preceding[-5:]).decode()
+                if len(preceding_str) > 2000:
+                    preceding_str = preceding_str[:2000]
+
+                documents.append(context)
+                metadatas.append({
+                    "response": ex["response"],
+                    # Prompt-ready forms, so format_examples() needn't rewrite them
+                    "display_context": display_text(context),
+                    "display_response": display_text(ex["response"]),
+                    "categories": ",".join(ex["categories"]),
+                    "chat_id": ex["chat_id"],
+                    "timestamp": ex["timestamp"],
+                    "context_length": ex.get("context_length", 1),
+                    "preceding_context": preceding_str,
+                })
+                ids.append(doc_id)
+
+                if len(documents) >= batch_size:
+                    self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+                    total += len(documents)
+                    documents, metadatas, ids = [], [], []
+
+        if documents:
+            self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+            total += len(documents)
+        self._count = None
 
         print(f"  ✓ Indexed {total:,} examples into '{self.collection_name}'")
         return total
 
     # ── Retrieval ─────────────────────────────────────────────────────────
 
+    def _embed_uncached(self, text: str) -> tuple[float, ...]:
+        """Embed one query; cached per exact text ("hi", "ok" repeat a lot)."""
+        return tuple(float(x) for x in self._embedding_fn([text])[0])
+
     def retrieve(
         self,
         query: str,
@@ -151,7 +175,8 @@ class VectorStore:
             distance, preceding_context.
         """
         k = top_k or RETRIEVAL_TOP_K
-        if self.collection.count() == 0:
+        total = self._count or self.count()
+        if total == 0:
             return []
 
         # Build where filter
@@ -168,18 +193,19 @@ class VectorStore:
         elif len(where_conditions) > 1:
             where = {"$and": where_conditions}
 
+        query_embeddings = [list(self._embed(query))]
         try:
             results = self.collection.query(
-                query_texts=[query],
-                n_results=min(k, self.collection.count()),
+                query_embeddings=query_embeddings,
+                n_results=min(k, total),
                 where=where,
             )
         except Exception as e:
             # Fallback: query without filters
             print(f"  [VectorStore] Filter query failed ({e}), retrying without filters")
             results = self.collection.query(
-                query_texts=[query],
-                n_results=min(k, self.collection.count()),
+                query_embeddings=query_embeddings,
+                n_results=min(k, total),
             )
 
         # Parse results
@@ -194,13 +220,16 @@ class VectorStore:
                 preceding = []
                 if meta.get("preceding_context"):
                     try:
-                        preceding = json.loads(meta["preceding_context"])
-                    except (json.JSONDecodeError, TypeError):
+                        preceding = orjson.loads(meta["preceding_context"])
+                    except (orjson.JSONDecodeError, TypeError):
                         preceding = []
 
                 retrieved.append({
                     "context": doc,
                     "response": meta["response"],
+                    # Indexes built before display forms existed lack these
+                    "display_context": meta.get("display_context") or display_text(doc),
+                    "display_response": meta.get("display_response") or display_text(meta["response"]),
                     "categories": meta.get("categories", "").split(","),
                     "chat_id": meta.get("chat_id", ""),
                     "distance": round(dist, 4),
@@ -212,8 +241,10 @@ class VectorStore:
     # ── Info ──────────────────────────────────────────────────────────────
 
     def count(self) -> int:
-        """Return number of indexed documents."""
-        return self.collection.count()
+        """Return number of indexed documents (and refresh the cached count)."""
+        total = self.collection.count()
+        self._count = total or None
+        return total
 
     def info(self) -> dict:
         """Return collection metadata."""
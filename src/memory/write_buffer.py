@@ -0,0 +1,107 @@
+"""
+Write-Behind Buffer
+===================
+Coalesces history writes into batched commits on a background thread.
+Used by the Firestore and Mongo backends, where every write is a network
+round trip — a burst of messages becomes one batch commit instead.
+"""
+
+import atexit
+import threading
+from collections import deque
+from typing import Any, Callable
+
+from src.config import HISTORY_FLUSH_INTERVAL, HISTORY_FLUSH_MAX_BATCH
+from src.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class WriteBehindBuffer:
+    """Queue items and hand them to `flush_fn` in ordered batches."""
+
+    def __init__(
+        self,
+        flush_fn: Callable[[list[Any]], None],
+        name: str = "history",
+        interval: float = None,
+        max_batch: int = None,
+    ):
+        self._flush_fn = flush_fn
+        self._name = name
+        self._interval = HISTORY_FLUSH_INTERVAL if interval is None else interval
+        self._max_batch = max_batch or HISTORY_FLUSH_MAX_BATCH
+
+        self._pending: deque = deque()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()        # cuts the coalescing pause short
+        self._flush_lock = threading.Lock()   # keeps batches in commit order
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def add(self, item: Any):
+        """Queue an item; it is written within ~interval seconds."""
+        self._pending.append(item)
+        if self._closed or len(self._pending) >= self._max_batch:
+            self.flush()
+            return
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def flush(self):
+        """Write everything pending right now (call before reads)."""
+        with self._flush_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self._max_batch:
+                    batch.append(self._pending.popleft())
+                try:
+                    self._flush_fn(batch)
+                except Exception as e:
+                    # Don't re-raise: callers are fire-and-forget writers
+                    logger.exception(
+                        "[%s] ERROR flushing %d buffered write(s): %s",
+                        self._name, len(batch), e,
+                    )
+
+    def close(self):
+        """Stop the flusher thread and drain synchronously."""
+        self._closed = True
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    # ── Background Flusher ────────────────────────────────────────────
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"{self._name}-write-behind",
+                    daemon=True,
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        # close() sets _closed before waking us, so re-checking it after
+        # every wait/sleep means a close() mid-sleep can't be missed
+        while not self._closed:
+            self._wakeup.wait()
+            if self._closed:
+                return
+            # Let concurrent writers pile up, then commit them together.
+            # Interruptible, so close() never waits out a long interval
+            # (the Sheets buffer pauses a full second).
+            self._stop.wait(self._interval)
+            if self._closed:
+                return   # close() drains whatever is pending
+            self._wakeup.clear()
+            self.flush()